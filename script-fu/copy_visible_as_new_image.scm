@@ -7,9 +7,55 @@
 ; create a new image from current visible
 ; ignore selection
 ; return the new image, the new layer and the new display
+;
+; copy-visible-as-new-image-batch does not create the display,
+; returns #f instead of it, for gimp -i where no display is available.
+; display-available? tells which one can be used,
+; as declared by the entry point with display-available!.
 
 (define (copy-visible-as-new-image inImage)
 
+  (let*
+    (
+      (copied (copy-visible-as-new-image-batch inImage))  ; (image layer #f)
+      (newDisplay (car (gimp-display-new (car copied)))) ; the display of new image
+    )
+
+    ; return the new image, the new layer and the new display
+    ; newDisplay will be required to delete this image later
+    (list (car copied) (cadr copied) newDisplay)
+  )
+)
+
+; display-available?: -> boolean
+; Returns #t when the entry point declared displays, otherwise #f.
+; Not probed by creating a display, which would flash a window.
+; #f works either way, the batch path needs no display.
+(define display-available-flag #f)
+
+(define (display-available?)
+  display-available-flag
+)
+
+; display-available!: boolean -> boolean
+; Declared by an entry point, #t from a menu of interactive GIMP,
+; #f for gimp -i -b.
+(define (display-available! available)
+  (set! display-available-flag available)
+  available
+)
+
+; discard-copied-image: list (image layer display) -> boolean
+; delete the display with its image, or the image when no display
+(define (discard-copied-image copied)
+  (if (caddr copied)
+    (gimp-display-delete (caddr copied))
+    (gimp-image-delete (car copied))
+  )
+)
+
+(define (copy-visible-as-new-image-batch inImage)
+
   (let* (
           ; define local variables
           (imageSrc inImage) ; the image to copy from
@@ -19,7 +65,6 @@
           (imageHeight (car (gimp-image-height imageSrc)))  ; the height of the image
           (imageType (car (gimp-image-base-type imageSrc)))  ; the type of the image (RGB, Gray, Indexed)
           (layerDestName "copied visible")  ; the name of the new layer
-          (newDisplay) ; the display of new image
 
           ;(GIMP_RGB 0)  ; RGB color space
           ;(GIMP_GRAY 1)  ; Gray color space
@@ -128,15 +173,11 @@
     ; add the new layer to the new image
     (gimp-image-insert-layer imageDest layerDest NO_PARENT_LAYER LAYER_POSITION_BOTTOM)
 
-    ; display the new image
-    (set! newDisplay (car (gimp-display-new imageDest)))
-
     ; done
 ;    (debug MESSAGE-DONE)
 
-    ; return the new image, the new layer and the new display
-    ; newDisplay will be required to delete this image later
-    (list imageDest layerDest newDisplay)
+    ; return the new image, the new layer and no display
+    (list imageDest layerDest #f)
   )
 )
 
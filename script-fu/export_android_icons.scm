@@ -11,6 +11,30 @@
 ; Iterates build shape and size in all combinations.
 ; Export as webp file.
 ; Discard the working copy.
+;
+; export-android-icons : menu entry, the case list is the variables below
+; export-android-icons-with : the same process with a given case list,
+;   the tree (icon-list) or flat records (case-list)
+; export-android-icons-batch : loads an image file and a case list file
+;   such as a shard written by android_icon_specification.py --shards,
+;   for gimp -i -b, see tools/gimp_batch_export.py
+;
+; Without any display (gimp -i), images are handled without displays.
+; The menu entry declares displays, the batch entry declares none,
+; see display-available! in copy_visible_as_new_image.scm.
+; The time taken for each icon and in total is logged with the mode.
+; At log-level "debug" with a display, the first icon of mode "each" is
+; also exported by both paths, and their times are logged side by side:
+;   TIME: display 40 ms, batch 25 ms, batch is 15 ms faster on an icon
+;
+; log-level in the case list chooses what goes to log-file,
+;   "off"      : nothing, log-file is not opened
+;   "summary"  : begin, errors and the total (default)
+;   "per-icon" : and a line for each icon and each outer case,
+;                ICON case=main/square size=48 width=48 height=48 ms=12 scale_ms=4 save_ms=6 mode=each display=batch path=/...
+;                CASE case=main/square ms=3
+;   "debug"    : and every step with the nodes, slow for large lists
+; Lines are buffered and written LOG-BUFFER-LINES at a time.
 
 (define (export-android-icons inImage inProject inVersion)
 
@@ -36,6 +60,10 @@
         '("square" "round")
       )
 
+      (export-mode
+        "each"
+      )
+
       (icon-list
         '
         ( #\L
@@ -506,8 +534,81 @@
         )
       )
 
+      (variables
+        (list
+          (cons 'hierarchy hierarchy)
+          (cons 'arguments arguments)
+          (cons 'iterator-build iterator-build)
+          (cons 'iterator-shape iterator-shape)
+          (cons 'export-mode export-mode)
+          (cons 'icon-list icon-list)
+        )
+      )
+
       ; --- variables END ---
 
+    )
+
+    (display-available! #t) ; the menu of interactive GIMP
+    (export-android-icons-with inImage inProject inVersion variables)
+  )
+
+)
+
+; variable-or: alist symbol object -> object
+; Returns the value of the key in variables, or the default when missing.
+(define (variable-or variables key default)
+  (let
+    ((pair (assq key variables)))
+    (if pair (cdr pair) default)
+  )
+)
+
+; case list file: a let form which returns variables as an alist
+; returns the alist
+(define (read-android-icon-variables inCaseFile)
+  (let*
+    (
+      (port (open-input-file inCaseFile))
+      (form (read port))
+    )
+    (close-input-port port)
+    (eval form)
+  )
+)
+
+; batch entry: export icons of the case list file from the image file
+(define (export-android-icons-batch inFile inCaseFile inProject inVersion)
+  (let*
+    (
+      (no-display (display-available! #f)) ; gimp -i -b
+      (image (car (gimp-file-load RUN-NONINTERACTIVE inFile inFile)))
+      (variables (read-android-icon-variables inCaseFile))
+      (return-value (export-android-icons-with image inProject inVersion variables))
+    )
+    (gimp-image-delete image)
+    return-value
+  )
+)
+
+(define (export-android-icons-with inImage inProject inVersion inVariables)
+
+  (let*
+    (
+
+      ; case list
+      (hierarchy (cdr (assq 'hierarchy inVariables)))
+      (arguments (cdr (assq 'arguments inVariables)))
+      (iterator-build (cdr (assq 'iterator-build inVariables)))
+      (iterator-shape (cdr (assq 'iterator-shape inVariables)))
+      (icon-list (variable-or inVariables 'icon-list #f)) ; the tree
+      (case-list (variable-or inVariables 'case-list #f)) ; or flat records, --flat
+      (export-mode (variable-or inVariables 'export-mode "each")) ; "each" or "pyramid"
+      (mode-pyramid? (string=? "pyramid" export-mode)) ; once here, not for each icon
+      (mode-each? (string=? "each" export-mode))
+      (visibility-plan (variable-or inVariables 'visibility-plan #f)) ; ((hide ...) (show ...)) for each outer case, --schedule gray
+      (log-level (variable-or inVariables 'log-level "summary")) ; "off", "summary", "per-icon" or "debug"
+      (use-display (display-available?)) ; as declared by the entry point, #f works without displays
 
       ; parameters
       (image inImage)     ; current image
@@ -520,9 +621,15 @@
 
       ; constants
       (LOG-FILE "/home/kuro/tmp/log.txt") ; to write info
+      (LOG-LEVELS '("off" "summary" "per-icon" "debug")) ; from the quietest
+      (LOG-BUFFER-LINES 256) ; lines kept before writing to log-file
       (DISCARD-FILE "/dev/null") ; to discard
+
+      ; log
+      (log-file (variable-or inVariables 'log-file LOG-FILE)) ; --log_file
       (ERROR-PARAMETER-MISSING "ERROR: Both of project and version are required.")  ; message to show when project or version are missing
       (MESSAGE-DONE "Done!")  ; message to show when done
+      (ERROR-RUN-FAILED "ERROR: failed at case")  ; message to show when a call fails, with the case
     )
 
     ;;
@@ -531,20 +638,79 @@
     ; from test.scm
 
     ;;
-    ;; (show-info ... args) : outupt multi-line results
+    ;; log levels
+
+    ; log-rank: string -> integer
+    ; position in LOG-LEVELS, unknown levels are taken as "summary"
+    (define (log-rank level)
+      (define (rank-in levels rank)
+        (cond
+          ((null? levels) 1)
+          ((string=? level (car levels)) rank)
+          (else (rank-in (cdr levels) (+ 1 rank)))
+        )
+      )
+      (rank-in LOG-LEVELS 0)
+    )
 
-    (define (show-info . objs)
-      (if (not (eq? () objs))
-        (let
-          ((port port-log-1))
-          ;((port (current-output-port)))
-          (echo (apply stringify (list DELIMITER (car objs))) port)
-          (newline port)
-          (apply show-info (cdr objs))
+    (define log-summary? (<= (log-rank "summary") (log-rank log-level)))
+    (define log-per-icon? (<= (log-rank "per-icon") (log-rank log-level)))
+    (define log-debug? (<= (log-rank "debug") (log-rank log-level)))
+
+    ;;
+    ;; buffered log lines, written to port-log-1 by flush-log
+
+    (define log-buffer (open-output-string))
+    (define log-buffered 0)
+
+    (define (log-line text)
+      (display text log-buffer)
+      (newline log-buffer)
+      (set! log-buffered (+ 1 log-buffered))
+      (if (<= LOG-BUFFER-LINES log-buffered)
+        (flush-log)
+      )
+    )
+
+    (define (flush-log)
+      (if (positive? log-buffered)
+        (begin
+          (display (get-output-string log-buffer) port-log-1)
+          (close-port log-buffer)
+          (set! log-buffer (open-output-string))
+          (set! log-buffered 0)
+        )
+      )
+    )
+
+    (define (log-lines objs)
+      (if (pair? objs)
+        (begin
+          (log-line (stringify DELIMITER (car objs)))
+          (log-lines (cdr objs))
         )
       )
     )
 
+    ;;
+    ;; (show-info ... args) : outupt multi-line results, at "debug"
+    ;; objects are not stringified below "debug"
+
+    (define (show-info . objs)
+      (if log-debug?
+        (log-lines objs)
+      )
+    )
+
+    ;;
+    ;; (show-summary ... args) : the same at "summary"
+
+    (define (show-summary . objs)
+      (if log-summary?
+        (log-lines objs)
+      )
+    )
+
     ;;
     ;; (debug args ...) : output results
 
@@ -912,22 +1078,30 @@
           (image (get-image opts))
         )
         (show-info "INFO: modify image to fit specified build and shape")
-        (list
-          (if (attribute-has-key? attr "build")
-            (let
-              ((value (attribute-search-key attr "build")))
-              (list
-                value
-                (handle-build image value)
+        (discard-pyramid)
+        (set! current-case (case-name (attribute-values attr '("build" "shape"))))
+        (set! case-start (now-ms))
+        (end-case
+          (if (pair? visibility-plan)
+            (apply-visibility-step image)
+            (list
+              (if (attribute-has-key? attr "build")
+                (let
+                  ((value (attribute-search-key attr "build")))
+                  (list
+                    value
+                    (handle-build image value)
+                  )
+                )
               )
-            )
-          )
-          (if (attribute-has-key? attr "shape")
-            (let
-              ((value (attribute-search-key attr "shape")))
-              (list
-                value
-                (handle-shape image value)
+              (if (attribute-has-key? attr "shape")
+                (let
+                  ((value (attribute-search-key attr "shape")))
+                  (list
+                    value
+                    (handle-shape image value)
+                  )
+                )
               )
             )
           )
@@ -935,6 +1109,18 @@
       )
     )
 
+    ; attribute-values: list (expected) list -> list
+    ; values of the keys found in attributes, in the order of keys
+    (define (attribute-values attr keys)
+      (cond
+        ((null? keys) ())
+        ((attribute-has-key? attr (car keys))
+          (cons (attribute-search-key attr (car keys)) (attribute-values attr (cdr keys)))
+        )
+        (else (attribute-values attr (cdr keys)))
+      )
+    )
+
     (define (func-a-2 node opts)
       (show-info "--- func-a-2 ---" node opts)
       (let*
@@ -978,7 +1164,7 @@
       (if (eqv? empty-list node)
         ()
         (begin
-          (show-info "ERROR: Unknown contens found")
+          (show-summary "ERROR: Unknown contens found")
           "ERROR: Unknown contens found"
         )
       )
@@ -994,24 +1180,36 @@
           (new-display 0) ; st new display
         )
         (set! new-image (car (gimp-image-duplicate image)))
-        (set! new-display (car (gimp-display-new new-image)))
+        (set! new-display
+          (if use-display (car (gimp-display-new new-image)) #f)
+        )
         (show-info "INFO: image duplicated:" new-image new-display)
         (list new-image new-display)
       )
     )
 
-    (define (discard-image display)
-      (show-info "GIMP: delete display and image" display)
-      (gimp-display-delete display)
+    ; display is #f at batch
+    (define (discard-image image display)
+      (show-info "GIMP: delete display and image" image display)
+      (if display
+        (gimp-display-delete display)
+        (gimp-image-delete image)
+      )
       "INFO: delete display and image"
     )
 
+    (define (flush-displays)
+      (if use-display
+        (gimp-displays-flush)
+      )
+    )
+
     (define (handle-build image build)
       (show-info "--- handle-build ---" image build)
       (show-info "GIMP: change layer visibility by build")
       (make-layers-invisible image iterator-build)
       (make-layers-visible image build)
-      (gimp-displays-flush)
+      (flush-displays)
       "INFO: change layer visibility by build"
     )
 
@@ -1020,10 +1218,27 @@
       (show-info "GIMP: change layer visibility by shape")
       (make-layers-invisible image iterator-shape)
       (make-layers-visible image shape)
-      (gimp-displays-flush)
+      (flush-displays)
       "INFO: change layer visibility by shape"
     )
 
+    ; toggles only the layers changed from the previous outer case
+    (define (apply-visibility-step image)
+      (let*
+        (
+          (step (car visibility-plan))
+          (hide (car step))
+          (show (cadr step))
+        )
+        (show-info "GIMP: change layer visibility by plan" hide show)
+        (make-layers-invisible image hide)
+        (apply make-layers-visible (cons image show))
+        (flush-displays)
+        (set! visibility-plan (cdr visibility-plan))
+        (list hide show)
+      )
+    )
+
     (define (handle-size image arg-size)
       (show-info "--- handle-size ---" image arg-size)
       (show-info "INFO: nothing here for GIMP")
@@ -1031,21 +1246,66 @@
     )
 
     (define (export-scaled-webp image arg-size arg-hierarchy)
-      (show-info "--- export-scaled-webp ---" image arg-size arg-hierarchy)
+      (export-webp-file image arg-size (list-get-last arg-hierarchy) (list-remove-last arg-hierarchy))
+    )
+
+    (define (export-webp-file image arg-size file-name dirs)
+      (show-info "--- export-webp-file ---" image arg-size file-name dirs)
       (show-info "GIMP: scale image and export as webp")
       (let
         (
-          (arguments (make-argument-export image arg-size arg-hierarchy))
+          (arguments (cons image (cons arg-size (cons file-name dirs))))
           (return-value ()) ; set return value of webp creation later
+          (start 0) ; set after the comparison, not to count it in the icon
         )
         (show-info "INFO: arguments for export-copy-as-webp" arguments)
-        (set! return-value (apply export-copy-as-webp arguments))
+        (if (and log-debug? use-display (not display-compared) mode-each?)
+          (compare-display-batch arguments)
+        )
+        (set! start (now-ms))
+        (set! return-value
+          (if mode-pyramid?
+            (apply export-image-as-webp (make-argument-pyramid image arg-size file-name dirs))
+            (if use-display
+              (apply export-copy-as-webp arguments)
+              (apply export-copy-as-webp-batch arguments)
+            )
+          )
+        )
+        (set! icon-count (+ 1 icon-count))
         (show-info (apply text-webp-done return-value))
+        (show-info (text-elapsed "an icon" start))
+        (if log-per-icon?
+          (log-line (apply text-icon-record (cons arg-size (cons start return-value))))
+        )
       )
       (show-info (text-wall "an icon finished."))
       "INFO: scale image and export as webp"
     )
 
+    ; exports an icon by the display path and by the batch path,
+    ; and logs the time of each, once in a run
+    (define (compare-display-batch arguments)
+      (let*
+        (
+          (start (now-ms))
+          (display-ms (begin (apply export-copy-as-webp arguments) (- (now-ms) start)))
+          (middle (now-ms))
+          (batch-ms (begin (apply export-copy-as-webp-batch arguments) (- (now-ms) middle)))
+        )
+        (set! display-compared #t)
+        (show-info (text-display-compared display-ms batch-ms))
+      )
+    )
+
+    (define (text-display-compared display-ms batch-ms)
+      (string-append
+        "TIME: display " (number->string display-ms) " ms"
+        ", batch " (number->string batch-ms) " ms"
+        ", batch is " (number->string (- display-ms batch-ms)) " ms faster on an icon"
+      )
+    )
+
     (define (valid-layer? item)
       (positive? item)
     )
@@ -1069,13 +1329,72 @@
       )
     )
 
-    (define (text-webp-done path width height)
+    (define (text-webp-done path width height . timings)
       (string-append
         "INFO: saved. `" path "`"
         " (" (number->string width) "x" (number->string height) ") "
       )
     )
 
+    (define (text-elapsed message start)
+      (string-append
+        "TIME: " message
+        " " (number->string (- (now-ms) start)) " ms"
+        " (" (if use-display "display" "batch") ", " export-mode ")"
+      )
+    )
+
+    ; parsed by tools/android_icon_export_log.py, path goes last as it may have spaces
+    (define (text-icon-record arg-size start path width height scale-ms save-ms)
+      (string-append
+        "ICON case=" current-case
+        " size=" (number->string arg-size)
+        " width=" (number->string width)
+        " height=" (number->string height)
+        " ms=" (number->string (- (now-ms) start))
+        " scale_ms=" (number->string scale-ms)
+        " save_ms=" (number->string save-ms)
+        " mode=" export-mode
+        " display=" (if use-display "display" "batch")
+        " path=" path
+      )
+    )
+
+    (define (text-case-record start)
+      (string-append
+        "CASE case=" current-case
+        " ms=" (number->string (- (now-ms) start))
+      )
+    )
+
+    ; case-name: list -> string
+    ; visible layers joined by "/"
+    (define (case-name layers)
+      (cond
+        ((null? layers) "-")
+        ((null? (cdr layers)) (car layers))
+        (else (string-append (car layers) "/" (case-name (cdr layers))))
+      )
+    )
+
+    ; end-case: object -> object
+    ; logs the time taken to prepare the outer case, returns the value as is
+    (define (end-case value)
+      (if log-per-icon?
+        (log-line (text-case-record case-start))
+      )
+      value
+    )
+
+    ; now-ms: -> integer
+    ; milliseconds by gettimeofday
+    (define (now-ms)
+      (let
+        ((now (gettimeofday)))
+        (+ (* 1000 (car now)) (quotient (cadr now) 1000))
+      )
+    )
+
     (define (text-wall message)
       (string-append
         "----:"
@@ -1143,13 +1462,41 @@
       (reverse (cdr (reverse list)))
     )
 
-    (define (make-argument-export image arg-size hierarchy)
-      (let*
-        (
-          (file-name (list-get-last hierarchy))
-          (dirs (list-remove-last hierarchy))
+    ; arguments for export-image-as-webp, to scale the pyramid down
+    (define (make-argument-pyramid image arg-size file-name dirs)
+      (let
+        ((copied (pyramid-for image arg-size)))
+        (cons (car copied) (cons (cadr copied) (cons arg-size (cons file-name dirs))))
+      )
+    )
+
+    ; pyramid-for: image integer -> list (image layer display)
+    ; Returns the pyramid, copied from visible when not yet or too small.
+    (define (pyramid-for image arg-size)
+      (if (and pyramid (> arg-size (car (gimp-image-width (car pyramid)))))
+        (discard-pyramid)
+      )
+      (if (not pyramid)
+        (begin
+          (show-info "GIMP: copy visible for the pyramid" image)
+          (set! pyramid
+            (if use-display
+              (copy-visible-as-new-image image)
+              (copy-visible-as-new-image-batch image)
+            )
+          )
+        )
+      )
+      pyramid
+    )
+
+    (define (discard-pyramid)
+      (if pyramid
+        (begin
+          (show-info "GIMP: delete display and image of the pyramid" pyramid)
+          (discard-copied-image pyramid)
+          (set! pyramid #f)
         )
-        (cons image (cons arg-size (cons file-name dirs)))
       )
     )
 
@@ -1246,6 +1593,24 @@
     ; In the case where the entire return value is not required,
     ; using node return value to pass size or something is best.
 
+    ; number of icons exported, for the time taken
+    (define icon-count 0)
+
+    ; #t once display and batch are compared, see compare-display-batch
+    (define display-compared #f)
+
+    ; the outer case being exported, and when it began
+    (define current-case "-")
+    (define case-start 0)
+
+    ; defines pyramid for export-mode "pyramid"
+    (define pyramid #f)
+    ; (image layer display) copied from visible once per build and shape,
+    ; then scaled down in place for each size.
+    ; Sizes are expected in descending order, as written by
+    ; android_icon_specification.py --export_mode pyramid,
+    ; a larger size copies from visible again.
+
 
     ; example1: for GIMP
     ; depth 1: modify image to fit build and shape
@@ -1260,9 +1625,10 @@
     (define (execute-example1 image project version arguments hierarchy node)
       (let
         ((return-value ()))
-        (show-info "BEGIN:")
+        (show-summary "BEGIN:")
         (let*
           (
+            (start (now-ms))
             ; a copy is used as a base working image
             (working (duplicate-image image))
             (new-image (car working))
@@ -1276,11 +1642,89 @@
 
           (set! return-value (example1 node opts))
           (show-info "return-value" return-value)
-          (discard-image new-display)
+          (discard-pyramid)
+          (discard-image new-image new-display)
 
           (show-info "INFO: working image was discarded")
+          (show-summary (text-elapsed (string-append (number->string icon-count) " icons") start))
         )
-        (show-info "DONE:")
+        (show-summary "DONE:")
+        return-value
+      )
+    )
+
+
+    ; flat case list
+
+    ; bind-arguments: list string string -> list
+    ; replace the symbols project and version in dirs by the arguments
+    (define (bind-arguments dirs project version)
+      (map
+        (lambda (dir)
+          (cond
+            ((eq? 'project dir) project)
+            ((eq? 'version dir) version)
+            (else dir)
+          )
+        )
+        dirs
+      )
+    )
+
+    ; execute-case-list: export icons of the flat case list
+    ; a record is (key (layer ...) width "file name" (dir ...)),
+    ; layers are made visible when the key changes.
+    (define (execute-case-list image project version records)
+      (show-summary "BEGIN:")
+      (let*
+        (
+          (start (now-ms))
+          (working (duplicate-image image))
+          (new-image (car working))
+          (new-display (cadr working))
+          (current-key #f)
+          (return-value
+            (map
+              (lambda (record)
+                (let
+                  (
+                    (key (car record))
+                    (layers (cadr record))
+                    (width (caddr record))
+                    (file-name (cadddr record))
+                    (dirs (car (cddddr record)))
+                  )
+                  (if (not (eqv? key current-key))
+                    (begin
+                      (show-info "GIMP: change layer visibility" layers)
+                      (discard-pyramid)
+                      (set! current-case (case-name layers))
+                      (set! case-start (now-ms))
+                      (end-case
+                        (if (pair? visibility-plan)
+                          (apply-visibility-step new-image)
+                          (begin
+                            (make-layers-invisible new-image iterator-build)
+                            (make-layers-invisible new-image iterator-shape)
+                            (apply make-layers-visible (cons new-image layers))
+                            (flush-displays)
+                          )
+                        )
+                      )
+                      (set! current-key key)
+                    )
+                  )
+                  (export-webp-file new-image width file-name (bind-arguments dirs project version))
+                )
+              )
+              records
+            )
+          )
+        )
+        (discard-pyramid)
+        (discard-image new-image new-display)
+        (show-summary (text-elapsed (string-append (number->string icon-count) " icons") start))
+        (show-summary "DONE:")
         return-value
       )
     )
@@ -1290,19 +1734,31 @@
     ;; process start here
 
     ;; output to file BEGIN
-    (define port-log-1 (open-output-file LOG-FILE))
+    (define port-log-1 (open-output-file (if log-summary? log-file DISCARD-FILE)))
     ;(define port-log-1 (current-output-port))
 
 ;    (debug "parameters: " image project version)
 
     (if parameter-is-missing
       (begin
-        (show-info ERROR-PARAMETER-MISSING)
+        (show-summary ERROR-PARAMETER-MISSING)
         (debug ERROR-PARAMETER-MISSING)
       )
       (begin
+        ; on an error, the buffered lines are written before it goes up to GIMP
         (set! return-value
-          (execute-example1 image project version arguments hierarchy icon-list)
+          (catch
+            (begin
+              (show-summary ERROR-RUN-FAILED current-case)
+              (flush-log)
+              (close-output-port port-log-1)
+              (error ERROR-RUN-FAILED current-case)
+            )
+            (if case-list
+              (execute-case-list image project version case-list)
+              (execute-example1 image project version arguments hierarchy icon-list)
+            )
+          )
         )
         ; done
         (debug MESSAGE-DONE)
@@ -1310,6 +1766,7 @@
     )
 
     ;; output to file END
+    (flush-log)
     (close-output-port port-log-1)
 
     return-value
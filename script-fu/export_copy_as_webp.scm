@@ -7,18 +7,73 @@
 ; copy visible as new image
 ; scale image if specified
 ; export as webp file
-; return the file name and size of image
+; return the file name and size of image,
+; and milliseconds taken to scale and to save
+;
+; export-image-as-webp does the latter on a given image,
+; without copying, and leaves the image scaled.
+;
+; export-copy-as-webp-batch works without any display, for gimp -i.
+; export-copy-as-webp selects it unless displays are declared,
+; see display-available! in copy_visible_as_new_image.scm.
 
 (define (export-copy-as-webp inImage inWidth inFileName inParentDir . inDirs)
 
+  (let* (
+          ; define local variables
+          (copiedDest  ; (image layer display) created, display is #f at batch
+            (if (display-available?)
+              (copy-visible-as-new-image inImage)
+              (copy-visible-as-new-image-batch inImage)
+            )
+          )
+          (imageDest (car copiedDest)) ; the image created
+          (layerDest (cadr copiedDest)) ; the drawable of the new image
+          (result) ; the file full path, width and height
+    ) ;end of local variables
+
+    (set! result
+      (apply export-image-as-webp
+        (cons imageDest (cons layerDest (cons inWidth (cons inFileName (cons inParentDir inDirs)))))
+      )
+    )
+
+    ; discard the copy
+    (discard-copied-image copiedDest)
+
+    result
+  )
+)
+
+(define (export-copy-as-webp-batch inImage inWidth inFileName inParentDir . inDirs)
 
   (let* (
           ; define local variables
-          (imageSrc inImage) ; the image to copy from
-          (copiedDest)  ; (image layer display) created
-          (imageDest) ; the image to be created
-          (layerDest) ; the drawable of the new image
-          (displayDest) ; the display of the new image
+          (copiedDest (copy-visible-as-new-image-batch inImage))  ; (image layer #f) created
+          (result) ; the file full path, width and height
+    ) ;end of local variables
+
+    (set! result
+      (apply export-image-as-webp
+        (cons (car copiedDest) (cons (cadr copiedDest) (cons inWidth (cons inFileName (cons inParentDir inDirs)))))
+      )
+    )
+
+    ; discard the copy
+    (gimp-image-delete (car copiedDest))
+
+    result
+  )
+)
+
+(define (export-image-as-webp inImage inLayer inWidth inFileName inParentDir . inDirs)
+
+
+  (let* (
+          ; define local variables
+          (imageSrc inImage) ; the image to scale and save
+          (imageDest inImage) ; the image to be saved
+          (layerDest inLayer) ; the drawable of the image
           (imageWidth (car (gimp-image-width imageSrc)))  ; the width of the image
           (imageHeight (car (gimp-image-height imageSrc)))  ; the height of the image
           (layerDestName "copy to export")  ; the name of the new layer
@@ -31,6 +86,10 @@
           (fileFullPath)  ; the full path of the file to be created
           (webp-save-procedure-args)  ; arguments for webp save procedure
           (fileSaveResult)  ; the result of the file save procedure
+          (scaleStart)  ; when scaling began, in milliseconds
+          (saveStart)  ; when saving began, in milliseconds
+          (scaleMs 0)  ; milliseconds taken to scale
+          (saveMs 0)  ; milliseconds taken to save
 
           ; GIMP_RUN_INTERACTIVE is already defined by GIMP as RUN-INTERACTIVE
           ;(GIMP_RUN_INTERACTIVE 0)  ; Interactive mode
@@ -50,6 +109,15 @@
     ;;
     ;; helper functions
 
+    ; now-ms: -> integer
+    ; milliseconds by gettimeofday
+    (define (now-ms)
+      (let
+        ((now (gettimeofday)))
+        (+ (* 1000 (car now)) (quotient (cadr now) 1000))
+      )
+    )
+
     ; from test.scm
 
     (define (debug obj1 . objn)
@@ -256,16 +324,9 @@
     (set! fileFullPath (join-file-path filePath inFileName))
 ;    (debug "fileName: " fileName ", filePath: " filePath ", fileFullPath: " fileFullPath)
 
-    ; new image from visible
-    ;(set! copiedDest (copy-visible-as-new-image RUN-NONINTERACTIVE imageSrc))
-    (set! copiedDest (copy-visible-as-new-image imageSrc))
-    (set! imageDest (car copiedDest))
-    (set! layerDest (cadr copiedDest))
-    (set! displayDest (caddr copiedDest))
-;    (debug "New Image:" imageDest ", New Layer:" layerDest ", New Display:" displayDest)
-
     ; scale image if specified and differs
 ;    (debug "New Width:" newWidth)
+    (set! scaleStart (now-ms))
     (if (and (positive? newWidth) (not (eqv? imageWidth newWidth)))
       (begin
         (set! newHeight (/ (* newWidth imageHeight) imageWidth))
@@ -279,8 +340,11 @@
       )
     )
 
-    ; flush the display
-    (gimp-displays-flush)
+    ; flush the display, if any
+    (if (display-available?)
+      (gimp-displays-flush)
+    )
+    (set! scaleMs (- (now-ms) scaleStart))
 
     ; save as webp file
     (set! webp-save-procedure-args
@@ -309,19 +373,16 @@
     )
 ;    (debug "webp-save-procedure-args:" webp-save-procedure-args)
 
+    (set! saveStart (now-ms))
     (set! fileSaveResult (apply file-webp-save webp-save-procedure-args))
+    (set! saveMs (- (now-ms) saveStart))
 ;    (debug "fileSaveResult:" fileSaveResult)
 
-    ; discard the copy
-;    (debug "Delete display and image:" displayDest)
-    (gimp-display-delete displayDest)
-
-
     ; done
 ;    (debug MESSAGE-DONE)
 
-    ; return the file full path, width and height
-    (list fileFullPath newWidth newHeight)
+    ; return the file full path, width, height and the timings
+    (list fileFullPath newWidth newHeight scaleMs saveMs)
   )
 )
 
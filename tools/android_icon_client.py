@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+r"""
+client of android_icon_specification.py at server mode
+copyright 2025, hanagai
+
+android_icon_client.py
+version: March 29, 2025
+
+start the server,
+  android_icon_specification.py --serve 127.0.0.1:8081
+  android_icon_specification.py --serve /tmp/android_icon.sock
+
+then request,
+  android_icon_client.py --server 127.0.0.1:8081 --format scheme -- --config ConfigTest --size 96,144
+"""
+
+import argparse
+import http.client
+import json
+import socket
+import sys
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+  r"""
+  HTTPConnection over a unix socket
+  """
+
+  def __init__(self, path, timeout=60):
+    super(UnixHTTPConnection, self).__init__("localhost", timeout=timeout)
+    self._path = path
+
+  def connect(self):
+    self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    self.sock.settimeout(self.timeout)
+    self.sock.connect(self._path)
+
+
+class GeneratorClient:
+  r"""
+  sends a config request, and returns outputs by format
+  """
+
+  def __init__(self, server="127.0.0.1:8081", timeout=60):
+    self._server = server
+    self._timeout = timeout
+
+  def connection(self):
+    if "/" in self._server or self._server.endswith(".sock"):
+      return UnixHTTPConnection(self._server, self._timeout)
+    host, _, port = self._server.rpartition(":")
+    return http.client.HTTPConnection(host or "127.0.0.1", int(port), timeout=self._timeout)
+
+  def params(self, argv):
+    r"""
+    ["--size", "96,144"] or ["--size=96,144"] -> {"size": "96,144"}
+    raises ValueError for an option without a value, or a value without an option
+    """
+    params = {}
+    index = 0
+    while index < len(argv):
+      arg = argv[index]
+      if not arg.startswith("--"):
+        raise ValueError(f"not an option: {arg}")
+      key, equal, value = arg[2:].partition("=")
+      if not equal:
+        if len(argv) <= index + 1 or argv[index + 1].startswith("--"):
+          raise ValueError(f"no value for --{key}")
+        index += 1
+        value = argv[index]
+      params[key] = value
+      index += 1
+    return params
+
+  def generate(self, params):
+    connection = self.connection()
+    try:
+      body = json.dumps(params)
+      connection.request("POST", "/generate", body, {"Content-Type": "application/json"})
+      response = connection.getresponse()
+      result = json.loads(response.read())
+    finally:
+      connection.close()
+    if 200 != response.status:
+      raise RuntimeError(f"{response.status}: {result.get('error')}")
+    return result
+
+
+def main():
+  parser = argparse.ArgumentParser(prog="android_icon_client.py", description="client of android_icon_specification.py server")
+  parser.add_argument("--server", default="127.0.0.1:8081", help="host:port or unix socket path (127.0.0.1:8081)")
+  parser.add_argument("--format", default="all", help="mkdir, git_add, scheme or all (all)")
+  parser.add_argument("args", nargs="*", help="args for android_icon_specification.py, after --")
+  args = parser.parse_args()
+
+  client = GeneratorClient(args.server)
+  try:
+    result = client.generate(client.params(args.args))
+  except (OSError, RuntimeError, ValueError) as e:
+    print(e, file=sys.stderr)
+    sys.exit(1)
+  if "all" == args.format:
+    for name in ("mkdir", "git_add", "scheme"):
+      print(result[name])
+  else:
+    print(result[args.format])
+
+
+class Test:
+  r"""
+  test cases, or hint for debugging...
+  """
+
+  def test_params(self):
+    r"""
+    test args into request params
+    """
+    client = GeneratorClient()
+    print(client.params(["--config", "ConfigTest", "--size=96,144", "--output=a=b"]))
+    for argv in (["--brace", "--size", "96"], ["--size"], ["96"]):
+      try:
+        client.params(argv)
+      except ValueError as e:
+        print(e)
+
+
+if __name__ == '__main__':
+
+  #Test().test_params()
+
+  main()
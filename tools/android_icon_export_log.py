@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+
+r"""
+report the time taken by export-android-icons from its log
+copyright 2025, hanagai
+
+android_icon_export_log.py
+version: March 29, 2025
+
+export with the per-icon log,
+  android_icon_specification.py --config Config1 --log_level per-icon --log_file /tmp/icons.log
+
+then read it,
+  android_icon_export_log.py /tmp/icons.log
+
+or compare two runs, such as before and after a change,
+  android_icon_export_log.py /tmp/before.log --compare /tmp/after.log
+
+the log is read line by line, so a large one is not loaded whole.
+a gzip file (.gz) and stdin (-) are also read.
+lines cut off or broken, as in the log of a run killed mid-write, are counted and skipped.
+
+lines are written by export_android_icons.scm,
+  ICON case=main/square size=48 width=48 height=48 ms=12 scale_ms=4 save_ms=6 mode=each display=batch path=/...
+  CASE case=main/square ms=3
+  TIME: 20 icons 1234 ms (batch, each)
+other lines are skipped.
+"""
+
+import argparse
+import gzip
+import heapq
+import io
+import sys
+
+
+class IconRecord:
+  r"""
+  an ICON line
+  """
+
+  __slots__ = ("case", "size", "ms", "scale_ms", "save_ms", "path")
+
+  def __init__(self, case, size, ms, scale_ms, save_ms, path):
+    self.case = case
+    self.size = size
+    self.ms = ms
+    self.scale_ms = scale_ms
+    self.save_ms = save_ms
+    self.path = path
+
+  def __lt__(self, other):
+    return self.ms < other.ms
+
+
+def parse_fields(text):
+  r"""
+  key=value fields of a line, path takes the rest as it may have spaces
+  """
+  fields = {}
+  rest = text
+  while rest:
+    if rest.startswith("path="):
+      fields["path"] = rest[len("path="):]
+      break
+    word, _, rest = rest.partition(" ")
+    key, _, value = word.partition("=")
+    if key:
+      fields[key] = value
+  return fields
+
+
+class ExportLog:
+  r"""
+  numbers of a run, gathered while the log is read
+
+  Export times are kept per size as histograms {ms: count} for the percentiles,
+  so memory grows with the distinct times, not with the icons;
+  other numbers are sums, and the slowest ones are kept in heaps of a fixed length.
+  Times per case are kept by the name of the outer case.
+  """
+
+  def __init__(self, name="", slowest=5):
+    self.name = name
+    self._slowest = slowest
+    self.icons = 0
+    self.icon_ms = 0
+    self.scale_ms = 0
+    self.save_ms = 0
+    self.visibility_ms = 0
+    self.cases = 0
+    self.total_ms = None
+    self.skipped = 0
+    self.mode = ""
+    self.display = ""
+    self._sizes = {}
+    self._case_ms = {}
+    self._slow_icons = []
+
+  def feed(self, line):
+    r"""
+    a line with a broken or missing number is counted in skipped
+    """
+    try:
+      self.feed_line(line.rstrip("\n"))
+    except (KeyError, ValueError):
+      self.skipped += 1
+
+  def feed_line(self, line):
+    if line.startswith("ICON "):
+      self.feed_icon(parse_fields(line[len("ICON "):]))
+    elif line.startswith("CASE "):
+      fields = parse_fields(line[len("CASE "):])
+      ms = int(fields["ms"])
+      self.cases += 1
+      self.visibility_ms += ms
+      self.add_case_ms(fields.get("case", "-"), ms)
+    elif line.startswith("TIME: ") and " icons " in line:
+      r"""
+      the total of a run, the last one wins when runs are appended
+      """
+      words = line.split()
+      self.total_ms = int(words[words.index("ms") - 1])
+
+  def feed_icon(self, fields):
+    r"""
+    size and ms are required, a line cut before them is broken
+    """
+    record = IconRecord(
+      fields.get("case", "-"),
+      int(fields["size"]),
+      int(fields["ms"]),
+      int(fields.get("scale_ms", 0)),
+      int(fields.get("save_ms", 0)),
+      fields.get("path", ""),
+    )
+    self.icons += 1
+    self.icon_ms += record.ms
+    self.scale_ms += record.scale_ms
+    self.save_ms += record.save_ms
+    self.mode = fields.get("mode", self.mode)
+    self.display = fields.get("display", self.display)
+    histogram = self._sizes.setdefault(record.size, {})
+    histogram[record.ms] = histogram.get(record.ms, 0) + 1
+    self.add_case_ms(record.case, record.ms)
+    if len(self._slow_icons) < self._slowest:
+      heapq.heappush(self._slow_icons, record)
+    else:
+      heapq.heappushpop(self._slow_icons, record)
+
+  def add_case_ms(self, case, ms):
+    self._case_ms[case] = self._case_ms.get(case, 0) + ms
+
+  def read(self, stream):
+    for line in stream:
+      self.feed(line)
+    return self
+
+  @property
+  def elapsed_ms(self):
+    r"""
+    the total logged by the run, or the sum of cases and icons without it
+    """
+    if None == self.total_ms:
+      return self.visibility_ms + self.icon_ms
+    return self.total_ms
+
+  @property
+  def throughput(self):
+    r"""
+    icons per second
+    """
+    if 0 == self.elapsed_ms:
+      return 0.0
+    return self.icons * 1000 / self.elapsed_ms
+
+  def percentile(self, histogram, count, percent):
+    r"""
+    nearest rank in a histogram {ms: count} of count values
+    """
+    rank = max(1, -(-count * percent // 100))
+    seen = 0
+    for ms in sorted(histogram):
+      seen += histogram[ms]
+      if rank <= seen:
+        return ms
+    return None
+
+  def sizes(self):
+    r"""
+    (size, count, p50, p95, mean) in descending order of size
+    """
+    rows = []
+    for size in sorted(self._sizes, reverse=True):
+      histogram = self._sizes[size]
+      count = sum(histogram.values())
+      total = sum(ms * n for ms, n in histogram.items())
+      rows.append((size, count, self.percentile(histogram, count, 50), self.percentile(histogram, count, 95), total / count))
+    return rows
+
+  def slowest_icons(self):
+    return sorted(self._slow_icons, reverse=True)
+
+  def slowest_cases(self):
+    r"""
+    (case, ms) of the outer cases, with their visibility and icons
+    """
+    return heapq.nlargest(self._slowest, self._case_ms.items(), key=lambda item: item[1])
+
+  def breakdown(self):
+    r"""
+    (part, ms) of the elapsed time
+    copy is what the icons took besides scale and save,
+    other is what the run took besides the cases and the icons.
+    """
+    return [
+      ("visibility", self.visibility_ms),
+      ("scale", self.scale_ms),
+      ("save", self.save_ms),
+      ("copy", self.icon_ms - self.scale_ms - self.save_ms),
+      ("other", max(0, self.elapsed_ms - self.visibility_ms - self.icon_ms)),
+    ]
+
+  def report(self, file=sys.stdout):
+    print(f"{self.name}: {self.icons} icons, {self.cases} cases in {self.elapsed_ms} ms"
+      f" ({self.throughput:.2f} icons/s, {self.display or '-'}, {self.mode or '-'})", file=file)
+    if self.skipped:
+      print(f"  skipped {self.skipped} broken lines", file=file)
+    print("  size  count    p50    p95   mean", file=file)
+    for size, count, p50, p95, mean in self.sizes():
+      print(f"  {size:4} {count:6} {p50:6} {p95:6} {mean:6.1f}", file=file)
+    print("  time", file=file)
+    elapsed = self.elapsed_ms or 1
+    for part, ms in self.breakdown():
+      print(f"    {part:10} {ms:8} ms {100 * ms / elapsed:5.1f}%", file=file)
+    print("  slowest cases", file=file)
+    for case, ms in self.slowest_cases():
+      print(f"    {case:20} {ms:8} ms", file=file)
+    print("  slowest icons", file=file)
+    for record in self.slowest_icons():
+      print(f"    {record.ms:8} ms {record.case} {record.size} {record.path}", file=file)
+
+
+def compare(before, after, file=sys.stdout):
+  r"""
+  differences of after from before
+  """
+  def change(a, b):
+    if 0 == a:
+      return "     -"
+    return f"{100 * (b - a) / a:+5.1f}%"
+
+  print(f"compare: {before.name} -> {after.name}", file=file)
+  print(f"  elapsed    {before.elapsed_ms:8} {after.elapsed_ms:8} ms {change(before.elapsed_ms, after.elapsed_ms)}", file=file)
+  print(f"  throughput {before.throughput:8.2f} {after.throughput:8.2f} /s {change(before.throughput, after.throughput)}", file=file)
+  for (part, a), (_, b) in zip(before.breakdown(), after.breakdown()):
+    print(f"  {part:10} {a:8} {b:8} ms {change(a, b)}", file=file)
+  after_sizes = {row[0]: row for row in after.sizes()}
+  print("  size    p50 before/after    p95 before/after", file=file)
+  for size, count, p50, p95, mean in before.sizes():
+    if size in after_sizes:
+      _, _, p50_after, p95_after, _ = after_sizes[size]
+      print(f"  {size:4} {p50:6} {p50_after:6} {change(p50, p50_after)}"
+        f" {p95:6} {p95_after:6} {change(p95, p95_after)}", file=file)
+
+
+def open_log(path):
+  if "-" == path:
+    return io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", errors="replace")
+  if path.endswith(".gz"):
+    return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+  return open(path, encoding="utf-8", errors="replace")
+
+
+def load(path, slowest):
+  with open_log(path) as stream:
+    return ExportLog(path, slowest).read(stream)
+
+
+def main():
+  parser = argparse.ArgumentParser(prog="android_icon_export_log.py", description="report the time taken by export-android-icons")
+  parser.add_argument("log", help="log file written at log-level per-icon, - for stdin")
+  parser.add_argument("--compare", help="log file of another run to compare with")
+  parser.add_argument("--slowest", type=int, default=5, help="number of slowest cases and icons (5)")
+  args = parser.parse_args()
+
+  try:
+    before = load(args.log, args.slowest)
+    before.report()
+    if args.compare:
+      after = load(args.compare, args.slowest)
+      print()
+      after.report()
+      print()
+      compare(before, after)
+  except OSError as e:
+    print(e, file=sys.stderr)
+    sys.exit(2)
+
+
+class Test:
+  r"""
+  test cases, or hint for debugging...
+  """
+
+  lines = [
+    "BEGIN:",
+    "ICON case=main/square size=48 width=48 height=48 ms=10 scale_ms=4 save_ms=5 mode=each display=batch path=/a/b c/48.webp",
+    "ICON case=main/square size=48 width=48 height=48 ms=30 scale_ms=10 save_ms=15 mode=each display=batch path=/a/48.webp",
+    "ICON case=main/square size=96 width=96 height=96 ms=50 scale_ms=20 save_ms=25 mode=each display=batch path=/a/96.webp",
+    "CASE case=main/square ms=7",
+    "ICON case=a size=abc ms=1",
+    "ICON case=main/round size=96 width=96 height=96 ms=",
+    "ICON case=main/round size=",
+    "ICON case=main/rou",
+    "CASE case=main/round",
+    "TIME: 3 icons 100 ms (batch, each)",
+  ]
+
+  def test_read(self):
+    r"""
+    test a log with broken lines, as one cut off mid-write
+    """
+    log = ExportLog("test").read(io.StringIO("\n".join(self.lines)))
+    print(log.icons, log.cases, log.skipped, log.total_ms)
+    print(log.sizes())
+    print(log.breakdown())
+    print([(record.ms, record.path) for record in log.slowest_icons()])
+    log.report()
+
+  def test_percentile(self, count=100000):
+    r"""
+    test percentiles of a histogram against sorted values
+    """
+    import random
+
+    values = [random.randint(1, 500) for i in range(count)]
+    histogram = {}
+    for ms in values:
+      histogram[ms] = histogram.get(ms, 0) + 1
+    values.sort()
+    log = ExportLog()
+    for percent in (1, 50, 95, 100):
+      rank = max(1, -(-count * percent // 100))
+      print(percent, log.percentile(histogram, count, percent) == values[rank - 1])
+
+
+if __name__ == '__main__':
+
+  #Test().test_read()
+  #Test().test_percentile()
+
+  main()
@@ -13,9 +13,34 @@ case list for GIMP Script-Fu
 See Document class for details.
 """
 
+import abc
 import argparse
+import ast
+import concurrent.futures
+import contextlib
+import gzip
+import hashlib
+import io
+import json
+import os
 import re
+import shutil
+import socket
+import socketserver
 import sys
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import scheme_reader
+
+try:
+  import tomllib
+except ImportError:
+  tomllib = None
+  r"""
+  TOML profiles require python 3.11 or later, JSON profiles work anyway
+  """
 
 r"""
 document
@@ -48,6 +73,28 @@ bash script to create subfolders.
     ("--shape", "icon shape in Iterator", "square,round"),
     ("--size", "icon size in Iterator", "48,72,96,144,192"),
     ("--dangeon", "dangeon map in Dangeon", "[['build', 'shape'], ['size']]"),
+    ("--output", "output directory in Output, stdout if not given", "out"),
+    ("--gzip", "compress files in output directory in Output", "1"),
+    ("--brace", "bash brace expansion for paths in Output", "1"),
+    ("--shards", "split scheme list into shards along the outer floor in Output", "4"),
+    ("--export_mode", "each or pyramid, sizes in descending order for pyramid in Output", "pyramid"),
+    ("--flat", "flat case list for GIMP Script-Fu, also for shards in Output", "1"),
+    ("--schedule", "tree or gray, outer cases in Gray order with visibility plan in Output", "gray"),
+    ("--log_level", "off, summary, per-icon or debug, log of GIMP Script-Fu in Output", "per-icon"),
+    ("--log_file", "log file of GIMP Script-Fu in Output", "/tmp/android_icons.log"),
+    ("--source", "source image file of the icons in Freshness", "icon.xcf"),
+    ("--fingerprints", "sidecar manifest of fingerprints in Freshness, next to source if not given", "icon.xcf.fingerprints.json"),
+    ("--up_to_date", "check to list only stale icons, record after export in Freshness", "check"),
+    ("--audit", "report missing, unexpected and empty icons on disk instead of the lists in Audit", "1"),
+    ("--verify", "check width and height in the webp headers of icons on disk instead of the lists in Audit", "1"),
+    ("--scheme_input", "scheme list to read the tree from, instead of building it in SchemeInput", "out/icon_list.scm"),
+    ("--scheme_check", "scheme list to compare with the tree, instead of the lists in SchemeInput", "out/icon_list.scm"),
+    ("--scheme_splice", "script to replace the variables block of, instead of the lists in SchemeInput", "../script-fu/export_android_icons.scm"),
+    ("--audit_jobs", "number of threads scanning directories or reading headers in Audit", "16"),
+    ("--serve", "run as server at host:port or unix socket path in Service", "127.0.0.1:8081"),
+    ("--workers", "size of worker pool in Service", "4"),
+    ("--profile", "profile name or file in ConfigProfile", "app1"),
+    ("--profile_dir", "directory of profile files in ConfigProfile", "profiles"),
   )
 
   r"""
@@ -94,15 +141,29 @@ flowchart TB
   ConfigBase --> ConfigDefault
   ConfigBase --> ConfigTest
   ConfigBase --> Config1
+  ConfigBase --> ConfigProfile
+  ProfileDirectory -- find --> Profile -- load --> ConfigProfile
+  ConfigProfile -- tables --> TableIterator
 
   Hierarchy -- customised --> config
   Iterator -- customised --> config
   Dangeon -- customised --> config
+  Output -- customised --> config
+  Freshness -- customised --> config
+  Audit -- customised --> config
+  SchemeInput -- customised --> config
 
   TreeExplorer --> FileExplorer
   FileExplorer --> MkdirExplorer --> bash1
   FileExplorer --> GitAddExplorer --> bash2
   TreeExplorer --> SchemeExplorer --> scheme
+  SchemeExplorer -- depth --> SchemeContext -- indent --> IndentTable
+  TreeExplorer --> LegacyExplorer
+  TreeExplorer --> CaseExplorer -- leaf --> Case
+  CaseExplorer --> cases
+
+  TreeNode -- subclass --> Nodes & Node & Attributes & HierarchyLeaf
+  TreeNode -- type --> the_tree
 
   Document -- define args --> ConfigBase
 
@@ -133,14 +194,35 @@ flowchart TB
   main -- args ---> ConfigDefault -- config ---> Executor
 
   TreeMaker -- create --> the_tree
+
+  Writer -- subclass --> StdoutWriter & DirectoryWriter & MemoryWriter
+  StdoutWriter -- buffer --> BufferedStream
+  Output -- select --> Writer
+  Executor -- report --> Writer
+  Executor -- compress --> BraceExpansion
+  Executor -- split --> shards[(scheme shards)] -- list --> manifest[(manifest)]
+  Executor -- schedule --> VisibilityPlan -- steps --> scheme
+  Executor -- check --> FingerprintManifest -- stale --> PruneExplorer -- prune --> the_tree
+  Executor -- record --> FingerprintManifest
+  Placeholder -- project, version --> HierarchyLeaf
+  scheme -- read --> SchemeTreeReader -- rebuild --> the_tree
+  Executor -- splice --> SchemeSplicer -- replace --> script[(export_android_icons.scm)]
+  Executor -- bind --> explorer
+  Executor -- audit --> IconAudit -- scandir --> disk[(icons on disk)]
+  Executor -- verify --> IconVerifier -- header --> WebpHeader -- read --> disk
+  explorer -- push --> LineCollector -- write --> Writer
   the_tree -- transform --> explorer
 
   Executor --- the_tree[(the tree)]
   Executor --- bash1[(bash mkdir)]
   Executor --- bash2[(bash gid add)]
   Executor --- scheme[(scheme list)]
+  Executor --- cases[(flat case list)]
 
   command([command line]) ----> main
+  client([client]) -- request --> GeneratorService
+  main -- serve --> GeneratorService -- run --> Executor
+  Service -- customised --> config
   bash1 -- stdout --> output([output result])
   bash2 -- stdout --> output([output result])
   scheme -- stdout --> output
@@ -156,6 +238,7 @@ subgraph hierarchies
   HierarchyDefault
   Hierarchy
   Iterator
+  TableIterator
   Instruction
   Dangeon
 end
@@ -164,6 +247,26 @@ subgraph collectors
   Collector
   TreeCollector
   LeafCollector
+  LineCollector
+end
+
+subgraph writers
+  BraceExpansion
+  Output
+  Writer
+  BufferedStream
+  StdoutWriter
+  DirectoryWriter
+  MemoryWriter
+end
+
+subgraph nodes
+  TreeNode
+  Nodes
+  Node
+  Attributes
+  HierarchyLeaf
+  Placeholder
 end
 
 subgraph tree
@@ -178,15 +281,33 @@ subgraph explorer
   MkdirExplorer
   GitAddExplorer
   SchemeExplorer
+  SchemeContext
+  IndentTable
+  LegacyExplorer
+  CaseExplorer
+  Case
+  PruneExplorer
 end
 
 subgraph runner
   Executor
+  VisibilityPlan
+  FingerprintManifest
+  IconAudit
+  IconVerifier
+  WebpHeader
+  SchemeTreeReader
+  SchemeSplicer
   main
+  Service
+  GeneratorService
   the_tree
   bash1
   bash2
   scheme
+  cases
+  shards
+  manifest
 end
 
 subgraph config
@@ -194,6 +315,9 @@ subgraph config
   ConfigDefault
   ConfigTest
   Config1
+  ConfigProfile
+  Profile
+  ProfileDirectory
 end
 
 subgraph tests
@@ -403,14 +527,15 @@ class Hierarchy:
     the keys are not checked, so this process can add keys.
     """
 
-  def update(self, *conditions):
-    instruction = Instruction()
+  def update(self, *conditions, converter=None):
+    instruction = Instruction(converter)
     for condition in conditions:
       instruction.update(**condition)
     self.instruction = instruction
     return self
     r"""
     update through instrucion by condition list
+    converter is an Iterator to convert conditions, Iterator class if None.
     """
 
   def __getattr__(self, name):
@@ -428,6 +553,42 @@ class Hierarchy:
       super(self.__class__, self).__setattr__(name, value)
 
 
+class Placeholder:
+  r"""
+  a segment of Hierarchy given at emit time, such as project and version
+
+  The tree is built with placeholders, and shared by any arguments;
+  explorers bound to arguments put the values in, see TreeExplorer.bind.
+  """
+
+  __slots__ = ("key",)
+
+  def __init__(self, key):
+    self.key = key
+
+  def __repr__(self):
+    return f"{self.__class__.__name__}({self.key!r})"
+
+  def __str__(self):
+    return "{" + self.key + "}"
+
+  def __eq__(self, other):
+    return self.__class__ == other.__class__ and self.key == other.key
+
+  def __hash__(self):
+    return hash((self.__class__, self.key))
+
+  @classmethod
+  def text(cls, segment):
+    r"""
+    a segment as str, to be written into a path or a list
+    raises ValueError for a placeholder left unbound, bind the explorer first
+    """
+    if isinstance(segment, cls):
+      raise ValueError(f"unbound {segment!r}, the explorer is not bound to arguments")
+    return str(segment)
+
+
 class Iterator:
   r"""
   list to iterate
@@ -591,13 +752,37 @@ class Iterator:
     self._shape = value
 
 
+class TableIterator(Iterator):
+  r"""
+  Iterator with tables to convert size and shape
+
+  tables are given by a profile, see Profile.
+  items not in the tables are converted as Iterator does.
+  """
+
+  def __init__(self, mipmap=None, icon_name=None, **kwargs):
+    super(TableIterator, self).__init__(**kwargs)
+    self._mipmap_table = {int(k): v for k, v in (mipmap or {}).items()}
+    self._icon_name_table = dict(icon_name or {})
+
+  def convert(self, iterator_key, iterator_value):
+    match iterator_key:
+      case "size" if iterator_value in self._mipmap_table:
+        return ("mipmap", self._mipmap_table[iterator_value])
+      case "shape" if iterator_value in self._icon_name_table:
+        return ("icon_name", self._icon_name_table[iterator_value])
+      case _:
+        return super(TableIterator, self).convert(iterator_key, iterator_value)
+
+
 class Instruction:
   r"""
   Instruction instance is a single case of iterating properties of Hierarchy.
   Properties are converted to fit Hierarchy.
   """
 
-  def __init__(self):
+  def __init__(self, converter=None):
+    self._converter = Iterator if None == converter else converter
     self.build = ""
     self.mipmap = ""
     self.icon_name = ""
@@ -612,11 +797,11 @@ class Instruction:
     )
 
   def get(self):
-    return self.__dict__.copy()
+    return {k: v for k, v in self.__dict__.items() if not k.startswith("_")}
 
   def update(self, **kwargs):
     for k, v in kwargs.items():
-      converted = Iterator.convert(k, v)
+      converted = self._converter.convert(k, v)
       if 2 == len(converted):
         self.__setattr__(*converted)
     r"""
@@ -625,6 +810,134 @@ class Instruction:
     """
 
 
+r"""
+typed nodes of the tree
+"""
+
+class TreeNode:
+  r"""
+  base class of typed nodes
+
+  Each class has a fixed set of slots, and a kind character
+  same as the identifier on the scheme side (#\L, #\N, #\A, #\H).
+
+  The legacy structure built with bare list, tuple and dict
+  is still accepted through from_legacy and to_legacy.
+    [ # list as nodes
+      ( # tuple as a node
+        {} # item#0 is dict as attributes
+        [] # item#1 is list as child nodes
+      )
+    ]
+  """
+
+  __slots__ = ()
+
+  kind = None
+
+  def __eq__(self, other):
+    return (
+      self.__class__ == other.__class__ and
+      all(getattr(self, k) == getattr(other, k) for k in self.__slots__)
+    )
+
+  def __repr__(self):
+    return (
+      f"{self.__class__.__name__}(" +
+      ", ".join(repr(getattr(self, k)) for k in self.__slots__) +
+      f")"
+    )
+
+  @classmethod
+  def from_legacy(cls, node):
+    r"""
+    convert the legacy structure into typed nodes
+    uses an explicit stack as TreeExplorer does.
+    """
+    results = []
+    stack = [(None, node)]
+    while stack:
+      count, node = stack.pop()
+      if None != count:
+        children = results[len(results) - count:]
+        del results[len(results) - count:]
+        results.append(Nodes(children) if isinstance(node, list) else Node(*children))
+      elif isinstance(node, TreeNode):
+        results.append(node)
+      elif isinstance(node, list) or isinstance(node, tuple):
+        stack.append((len(node), node))
+        for child in reversed(node):
+          stack.append((None, child))
+      elif isinstance(node, dict):
+        contents = node.get(TreeExplorer.MARK_AS_HIERARCHY)
+        results.append(Attributes(node) if None == contents else HierarchyLeaf(contents))
+      else:
+        results.append(node)
+    return results.pop()
+
+  def to_legacy(self):
+    r"""
+    convert typed nodes into the legacy structure
+    """
+    return LegacyExplorer().begin(self, {})
+
+
+class Nodes(TreeNode):
+  r"""
+  list of node
+  """
+
+  __slots__ = ("children",)
+
+  kind = "L"
+
+  def __init__(self, children=()):
+    self.children = list(children)
+
+
+class Node(TreeNode):
+  r"""
+  a node, attributes and body (nodes or hierarchy leaf)
+  """
+
+  __slots__ = ("attributes", "body")
+
+  kind = "N"
+
+  def __init__(self, attributes, body):
+    self.attributes = attributes
+    self.body = body
+
+
+class Attributes(TreeNode):
+  r"""
+  attributes of a node, items picked from Iterator
+  """
+
+  __slots__ = ("values",)
+
+  kind = "A"
+
+  def __init__(self, values):
+    self.values = dict(values)
+
+  def items(self):
+    return self.values.items()
+
+
+class HierarchyLeaf(TreeNode):
+  r"""
+  leaf of the tree, contents of Hierarchy
+  """
+
+  __slots__ = ("contents",)
+
+  kind = "H"
+
+  def __init__(self, contents):
+    self.contents = contents
+
+
 r"""
 collector helps gathering items from deeply nested structure
 """
@@ -704,6 +1017,43 @@ class LeafCollector(Collector):
     """
 
 
+class LineCollector(Collector):
+  r"""
+  for writing out instead of collecting
+
+  Each pushed item is written into the stream as a line at once,
+  so the whole output is never held in memory.
+  Lines are joined by linefeed, without one after the last line.
+  """
+
+  def __init__(self, stream, prefix="", unique=False):
+    super(self.__class__, self).__init__()
+    self._stream = stream
+    self._prefix = prefix
+    self._seen = set() if unique else None
+    self._count = 0
+    r"""
+    unique drops items already written, keeping the first order.
+    """
+
+  def push(self, value):
+    if None != self._seen:
+      if value in self._seen:
+        return
+      self._seen.add(value)
+    self._stream.write(("\n" if self._count else "") + self._prefix + value)
+    self._count += 1
+
+  def pop(self):
+    raise TypeError(f"{self.__class__.__name__} can not pop written lines")
+
+  def get(self):
+    return self._count
+    r"""
+    number of lines written
+    """
+
+
 r"""
 explorer into the deep dangeon
 
@@ -779,10 +1129,11 @@ class FloorMixer(Collector):
   gather rooms across floors
   """
 
-  def __init__(self, hierarchy, dangeon):
+  def __init__(self, hierarchy, dangeon, converter=None):
     super(self.__class__, self).__init__()
     self._hierarchy = hierarchy
     self._dangeon = list(dangeon)
+    self._converter = converter
 
   def is_end(self, floor_number):
     return floor_number >= len(self._dangeon)
@@ -795,7 +1146,7 @@ class FloorMixer(Collector):
       return self.hierarchy(collector.get())
     else:
       floor = self._dangeon[floor_number]
-      return list(map(
+      return Nodes(map(
         lambda item:
         self.next_floor(collector, item, floor_number)
         , self.into_rooms(floor)
@@ -804,11 +1155,9 @@ class FloorMixer(Collector):
   def next_floor(self, collector, item, floor_number):
     new_collector = collector.new()
     new_collector.push(item)
-    return tuple(
-      [
-        item,
-        self.tree_search(new_collector, 1 + floor_number)
-      ]
+    return Node(
+      Attributes(item),
+      self.tree_search(new_collector, 1 + floor_number)
     )
 
   def dive(self):
@@ -825,7 +1174,7 @@ class FloorMixer(Collector):
       return rooms.dive()
 
   def hierarchy(self, conditions):
-    return {TreeExplorer.MARK_AS_HIERARCHY: self._hierarchy.update(*conditions).get()}
+    return HierarchyLeaf(self._hierarchy.update(*conditions, converter=self._converter).get())
 
 
 class Dangeon:
@@ -903,7 +1252,7 @@ class TreeMaker:
     """
 
   def dive(self):
-    floors = FloorMixer(self._hierarchy, self._dangeon_map)
+    floors = FloorMixer(self._hierarchy, self._dangeon_map, self._adventure_map)
     self._tree = floors.dive()
     return self._tree
 
@@ -915,34 +1264,93 @@ tree explorer
 class TreeExplorer:
   r"""
   base class to explore the tree
+
+  The tree is walked with an explicit stack, not by recursion,
+  so the depth of the tree is not limited by the recursion limit.
+
+  Nodes and node are branches, they have a pair of hooks.
+    enter_* is called before the children, returns (child, opts) list.
+    leave_* is called after the children, with results of the children.
+  Attributes and hierarchy are leaves, func_* is called once.
   """
 
   MARK_AS_HIERARCHY = "Marked as Hierarchy"
+  r"""
+  key of the hierarchy in the legacy structure, see TreeNode
+  """
+
+  arguments = None
+  r"""
+  values of Placeholder segments, left as placeholders if None
+  writing a placeholder left unbound raises ValueError, see Placeholder.text
+  """
 
   def begin(self, node, opts):
     return self.apply_node(node, opts)
 
+  def bind(self, arguments):
+    r"""
+    returns self, bound to arguments as {"project": "MyApp", ...}
+    """
+    self.arguments = arguments
+    return self
+
+  def handler_table(self):
+    r"""
+    node class -> (enter, leave)
+    leave is None for leaves, enter is called as func_*.
+    """
+    return {
+      Nodes: (self.enter_l, self.leave_l),
+      Node: (self.enter_n, self.leave_n),
+      Attributes: (self.func_a, None),
+      HierarchyLeaf: (self.func_h, None),
+    }
+
   def apply_node(self, node, opts):
-    match self.node_type(node):
-      case "L":
-        return self.func_l(node, opts)
-      case "N":
-        return self.func_n(node, opts)
-      case "A":
-        return self.func_a(node, opts)
-      case "H":
-        return self.func_h(node, opts)
-      case _:
-        return self.func_else(node, opts)
+    r"""
+    explicit stack traversal engine
 
-  def func_l(self, node, opts):
-    return [self.apply_node(item, opts) for item in node]
+    a stack frame is (count, leave, node, opts).
+    count is None on entering the node,
+    or number of children to gather on leaving the node.
+    """
+    if not isinstance(node, TreeNode):
+      node = TreeNode.from_legacy(node)
+    table = self.handler_table()
+    results = []
+    stack = [(None, None, node, opts)]
+    while stack:
+      count, leave, node, opts = stack.pop()
+      if None != count:
+        values = results[len(results) - count:]
+        del results[len(results) - count:]
+        results.append(leave(node, opts, values))
+        continue
+      enter, leave = table.get(node.__class__, (self.func_else, None))
+      if None == leave:
+        results.append(enter(node, opts))
+      else:
+        children = enter(node, opts)
+        stack.append((len(children), leave, node, opts))
+        for child, child_opts in reversed(children):
+          stack.append((None, None, child, child_opts))
+    return results.pop()
+
+  def enter_l(self, node, opts):
+    return [(item, opts) for item in node.children]
+
+  def leave_l(self, node, opts, results):
+    return results
+
+  def enter_n(self, node, opts):
+    return [
+      (self.node_attribute(node), opts),
+      (self.node_body(node), opts)
+    ]
 
-  def func_n(self, node, opts):
-    return (
-      self.apply_node(self.node_attribute(node), opts),
-      self.apply_node(self.node_body(node), opts)
-    )
+  def leave_n(self, node, opts, results):
+    return tuple(results)
 
   def func_a(self, node, opts):
     return node
@@ -954,40 +1362,104 @@ class TreeExplorer:
     return "NOT EXPECTED"
 
   def node_type(self, node):
-    if isinstance(node, list):
-      return "L"  # nodes
-    elif isinstance(node, tuple):
-      return "N"  # node
-    elif isinstance(node, dict):
-      if self.is_marked_as_hierarchy(node):
-        return "H"  # hierarchy
-      else:
-        return "A"  # attributes
-    else:
-      return None
-
-  r"""
-  the tree structure is something tricky,
-    [ # list as nodes
-      ( # tuple as a node
-        {} # item#0 is dict as attributes
-        [] # item#1 is list as child nodes
-      )
-    ]
-  """
+    return node.kind if isinstance(node, TreeNode) else None
 
   def node_attribute(self, node):
-    return node[0]
+    return node.attributes
 
   def node_body(self, node):
-    return node[1]
+    return node.body
 
   def get_hierarchy_contents(self, node):
-    return node.get(self.MARK_AS_HIERARCHY)
+    if None == self.arguments:
+      return node.contents
+    return {
+      k: self.arguments.get(v.key, v) if isinstance(v, Placeholder) else v
+      for k, v in node.contents.items()
+    }
+
+
+class LegacyExplorer(TreeExplorer):
+  r"""
+  explores the tree to convert into the legacy structure
+  """
+
+  def func_a(self, node, opts):
+    return dict(node.values)
+
+  def func_h(self, node, opts):
+    return {self.MARK_AS_HIERARCHY: node.contents}
+
+
+class Case:
+  r"""
+  a leaf of the tree with the attributes of its path
+
+  floors: attributes of each floor from the outer, as tuple of (key, value)
+  hierarchy: contents of the hierarchy leaf
+  """
+
+  __slots__ = ("floors", "hierarchy")
+
+  def __init__(self, floors, hierarchy):
+    self.floors = floors
+    self.hierarchy = hierarchy
+
+  def __repr__(self):
+    return f"{self.__class__.__name__}({self.floors!r}, {self.segments()!r})"
+
+  def attributes(self):
+    r"""
+    attributes of all floors in a dict
+    """
+    return dict(item for floor in self.floors for item in floor)
+
+  def segments(self):
+    return list(self.hierarchy[k] for k in self.hierarchy.get("key_list"))
+
+  def path(self):
+    r"""
+    file path, same as in git_add.sh
+    """
+    return GitAddExplorer().file_path([Placeholder.text(segment) for segment in self.segments()])
+
+
+class CaseExplorer(TreeExplorer):
+  r"""
+  explores the tree to list leaves as Case, in the order of the tree
 
-  def is_marked_as_hierarchy(self, node):
-    return None != self.get_hierarchy_contents(node)
+  opts is (collector, floors) where floors grows on entering a node.
+  """
+
+  def begin(self, node, opts):
+    collector = opts.get("collector")
+    if None == collector:
+      collector = TreeCollector()
+    self.apply_node(node, (collector, ()))
+    return collector.get()
+
+  def enter_n(self, node, opts):
+    collector, floors = opts
+    return [
+      (self.node_attribute(node), opts),
+      (self.node_body(node), (collector, floors + (tuple(self.node_attribute(node).items()),)))
+    ]
+
+  def leave_l(self, node, opts, results):
+    pass
+
+  def leave_n(self, node, opts, results):
+    pass
 
+  def func_a(self, node, opts):
+    pass
+
+  def func_h(self, node, opts):
+    collector, floors = opts
+    collector.push(Case(floors, self.get_hierarchy_contents(node)))
+
+  def func_else(self, node, opts):
+    raise ValueError(f"not expected in the tree: {node!r}")
 
 
 class FileExplorer(TreeExplorer):
@@ -1002,14 +1474,22 @@ class FileExplorer(TreeExplorer):
     return opts["collector"].get()
 
   def func_h(self, node, opts):
-    hierarchy = self.get_hierarchy_contents(node)
-    directories = hierarchy.get("key_list")
-    segments = list(hierarchy[k] for k in directories)
-    opts["collector"].push(segments)
+    opts["collector"].push(self.file_path(self.hierarchy_segments(node)))
 
   def func_else(self, node, opts):
     opts["collector"].push("NOT EXPECTED")
 
+  def hierarchy_segments(self, node):
+    hierarchy = self.get_hierarchy_contents(node)
+    directories = hierarchy.get("key_list")
+    return list(Placeholder.text(hierarchy[k]) for k in directories)
+
+  def file_path(self, segments):
+    r"""
+    override this to convert segments into the item to collect
+    """
+    return segments
+
   def linux_like(self, segments):
     r"""
     root directory start with / ?
@@ -1031,12 +1511,8 @@ class MkdirExplorer(FileExplorer):
   explores the tree to make bash mkdir command
   """
 
-  def func_h(self, node, opts):
-    super(self.__class__, self).func_h(node, opts)
-    segments = opts["collector"].pop()
-    path = self.build_path_without_file_name(segments)
-    #command = f"mkdir -p {path}"
-    opts["collector"].push(path)
+  def file_path(self, segments):
+    return self.build_path_without_file_name(segments)
 
 
 class GitAddExplorer(FileExplorer):
@@ -1044,17 +1520,87 @@ class GitAddExplorer(FileExplorer):
   explores the tree to make bash git add command
   """
 
+  def file_path(self, segments):
+    return self.build_path_with_file_name(segments)
+
+
+class PruneExplorer(FileExplorer):
+  r"""
+  explores the tree to make a copy with the files in opts["keep"] only
+
+  nodes left without files are removed,
+  the whole tree is Nodes even when nothing is left.
+  """
+
+  def begin(self, node, opts):
+    tree = self.apply_node(node, opts)
+    return Nodes() if None == tree else tree
+
+  def leave_l(self, node, opts, results):
+    children = [child for child in results if None != child]
+    return Nodes(children) if children else None
+
+  def leave_n(self, node, opts, results):
+    attributes, body = results
+    return None if None == body else Node(attributes, body)
+
   def func_h(self, node, opts):
-    super(self.__class__, self).func_h(node, opts)
-    segments = opts["collector"].pop()
-    path = self.build_path_with_file_name(segments)
-    #command = f"git add {path}"
-    opts["collector"].push(path)
+    path = self.build_path_with_file_name(self.hierarchy_segments(node))
+    return node if path in opts["keep"] else None
+
+
+class IndentTable:
+  r"""
+  indentation strings by depth, computed once for each depth
+  """
+
+  def __init__(self, base_margin=4, tab=" "*2):
+    self._base_margin = base_margin
+    self._tab = tab
+    self._indents = []
+
+  def __getitem__(self, depth):
+    while depth >= len(self._indents):
+      self._indents.append(self._tab * (self._base_margin + len(self._indents)))
+    return self._indents[depth]
+
+
+class SchemeContext:
+  r"""
+  immutable traversal context for SchemeExplorer
+
+  holds the collector, the depth and the indentation table.
+  Contexts for each depth are created once and shared,
+  so visiting a child costs a list lookup, not a copy of opts.
+  """
+
+  __slots__ = ("collector", "indents", "depth", "margin0", "margin1", "margin2", "_levels")
+
+  def __init__(self, collector, indents, depth=0, levels=None):
+    self.collector = collector
+    self.indents = indents
+    self.depth = depth
+    self.margin0 = indents[depth]
+    self.margin1 = indents[1 + depth]
+    self.margin2 = indents[2 + depth]
+    self._levels = [self] if None == levels else levels
+
+  def __str__(self):
+    return f"{self.__class__.__name__}(depth={self.depth})"
+
+  def deeper(self):
+    depth = 1 + self.depth
+    levels = self._levels
+    if depth == len(levels):
+      levels.append(self.__class__(self.collector, self.indents, depth, levels))
+    return levels[depth]
 
 
 class SchemeExplorer(TreeExplorer):
   r"""
   expores the tree to make scheme list for GIMP script-fu
+
+  handlers get SchemeContext instead of opts.
   """
 
   def __init__(self, base_margin=4, tab=" "*2):
@@ -1068,145 +1614,1559 @@ class SchemeExplorer(TreeExplorer):
       opts["margin"] = self.base_margin
     if None == opts.get("tab"):
       opts["tab"] = self.tab
-    node_result = self.apply_node(node, opts)
+    context = SchemeContext(opts["collector"], IndentTable(opts["margin"], opts["tab"]))
+    node_result = self.apply_node(node, context)
     return opts["collector"].get()
 
-  def func_l(self, node, opts):
-    margin = opts["tab"] * opts["margin"]
-    opts["collector"].push(margin + "( #\\L")
-    for item in node:
-      self.apply_node(item, self.margin_plus(opts))
-    opts["collector"].push(margin + ")")
+  def enter_l(self, node, context):
+    context.collector.push(context.margin0 + "( #\\L")
+    child = context.deeper()
+    return [(item, child) for item in node.children]
 
-  def func_n(self, node, opts):
-    margin = opts["tab"] * opts["margin"]
-    opts["collector"].push(margin + "( #\\N")
-    self.apply_node(self.node_attribute(node), self.margin_plus(opts)),
-    self.apply_node(self.node_body(node), self.margin_plus(opts))
-    opts["collector"].push(margin + ")")
+  def leave_l(self, node, context, results):
+    context.collector.push(context.margin0 + ")")
 
-  def func_a(self, node, opts):
-    margin0 = opts["tab"] * opts["margin"]
-    margin1 = margin0 + opts["tab"]
-    margin2 = margin1 + opts["tab"]
-    opts["collector"].push(margin0 + "( #\\A")
+  def enter_n(self, node, context):
+    context.collector.push(context.margin0 + "( #\\N")
+    child = context.deeper()
+    return [
+      (self.node_attribute(node), child),
+      (self.node_body(node), child)
+    ]
+
+  def leave_n(self, node, context, results):
+    context.collector.push(context.margin0 + ")")
+
+  def func_a(self, node, context):
+    margin0 = context.margin0
+    margin1 = context.margin1
+    margin2 = context.margin2
+    push = context.collector.push
+    push(margin0 + "( #\\A")
     for k, v in node.items():
       quote = '' if "size" == k else '"'
-      opts["collector"].push(margin1 + "(")
-      opts["collector"].push(margin2 + f'"{k}"')
-      opts["collector"].push(margin1 + ".")
-      opts["collector"].push(margin2 + f'{quote}{v}{quote}')
-      opts["collector"].push(margin1 + ")")
-    opts["collector"].push(margin0 + ")")
-
-  def func_h(self, node, opts):
+      push(margin1 + "(")
+      push(margin2 + f'"{k}"')
+      push(margin1 + ".")
+      push(margin2 + f'{quote}{v}{quote}')
+      push(margin1 + ")")
+    push(margin0 + ")")
+
+  def func_h(self, node, context):
     hierarchy = self.get_hierarchy_contents(node)
     directories = hierarchy.get("key_list")
-    segments = list(hierarchy[k] for k in directories)
-    self.expand_dir_segments(segments, opts)
+    segments = list(Placeholder.text(hierarchy[k]) for k in directories)
+    self.expand_dir_segments(segments, context)
 
-  def func_else(self, node, opts):
-    opts["collector"].push("NOT EXPECTED")
+  def func_else(self, node, context):
+    context.collector.push("NOT EXPECTED")
 
-  def expand_dir_segments(self, segments, opts):
+  def expand_dir_segments(self, segments, context):
     r"""
     convert segment list to (list) in scheme
     """
 
-    margin0 = opts["tab"] * opts["margin"]
-    margin1 = margin0 + opts["tab"]
-    opts["collector"].push(margin0 + "( #\\H")
+    margin1 = context.margin1
+    push = context.collector.push
+    push(context.margin0 + "( #\\H")
     for d in segments:
-      opts["collector"].push(margin1 + f'"{d}"')
-    opts["collector"].push(margin0 + ")")
-
-  def margin_plus(self, opts):
-    new_opts = {}
-    for k in opts.keys():
-      new_opts[k] = 1 + opts[k] if "margin" == k else opts[k]
-    return new_opts
+      push(margin1 + f'"{d}"')
+    push(context.margin0 + ")")
 
 
 r"""
-main executor
+brace expansion
 """
 
-class Executor:
+class BraceExpansion:
   r"""
-  called from main with command line arguments
-  handles whole processes
-  """
+  compress paths into bash brace expansions, and verify them
 
-  def __init__(self, config):
-    self._config = config
-    #self._args = args    #self.parse_args(args)
-    #self._iterator_args = {k:self.__getattribute__(k) for k in Iterator.key_list if k in self._keys}
+  Paths from the tree form a grid,
+  such as build x mipmap x icon_name under a shared prefix.
 
-  def make_tree(self):
-    r"""
-    build the tree structure
-    """
+    /p/app/src/main/res/mipmap-mdpi
+    /p/app/src/main/res/mipmap-hdpi
+    /p/app/src/debug/res/mipmap-mdpi
+    /p/app/src/debug/res/mipmap-hdpi
 
-    self._tree_maker = TreeMaker(
-      self._config.hierarchy(),
-      self._config.iterator(),
-      self._config.dangeon()
-    )
-    return self._tree_maker.dive()
+  are compressed into a single word.
 
-  def make_mkdir_sh(self):
-    r"""
-    make bash script from the tree
-    """
+    /p/app/src/{main,debug}/res/mipmap-{m,h}dpi
 
-    explorer = MkdirExplorer()
-    directories = explorer.begin(self._tree, {})
-    unique = list(set(directories))
-    mkdir = "\n".join(
-      (f"mkdir -p {d}" for d in unique)
-    )
+  Paths are split by / into segments,
+  a set of paths covering all combinations of segments becomes a word.
+  Otherwise the paths are divided by the segment with fewest values,
+  and divisions with the same remaining words are merged again.
+  """
 
-    return ("#!/bin/sh"
-      f"""
-# create directories
+  separator = "/"
+
+  special = re.compile(r"([^\w./@%+=:-])")
+  r"""
+  characters to be escaped by backslash in a word
+  """
+
+  def compress(self, paths, verify=True):
+    r"""
+    paths -> words in first seen order, duplicates are dropped
+    """
+    unique = list(dict.fromkeys(paths))
+    by_length = {}
+    for path in unique:
+      segments = tuple(path.split(self.separator))
+      by_length.setdefault(len(segments), []).append(segments)
+    words = [
+      self.render(pattern)
+      for rows in by_length.values()
+      for pattern in self.group(rows)
+    ]
+    if verify:
+      self.verify(unique, words)
+    return words
+
+  def group(self, rows):
+    r"""
+    rows of segments -> patterns, tuple of values for each segment
+    """
+    columns = [tuple(dict.fromkeys(column)) for column in zip(*rows)]
+    combinations = 1
+    for column in columns:
+      combinations *= len(column)
+    if combinations == len(rows):
+      return [tuple(columns)]
+    varying = [i for i, column in enumerate(columns) if 1 < len(column)]
+    split = min(varying, key=lambda i: len(columns[i]))
+    divisions = {}
+    for row in rows:
+      divisions.setdefault(row[split], []).append(row)
+    merged = {}
+    for value, division in divisions.items():
+      patterns = self.group(division)
+      key = tuple(p[:split] + p[1 + split:] for p in patterns)
+      merged.setdefault(key, []).append(value)
+    return [
+      p[:split] + (tuple(values),) + p[split:]
+      for key, values in merged.items()
+      for p in key
+    ]
+
+  def render(self, pattern):
+    return self.separator.join(self.render_values(values) for values in pattern)
+
+  def render_values(self, values):
+    r"""
+    ("mipmap-mdpi", "mipmap-hdpi") -> mipmap-{m,h}dpi
+    """
+    if 1 == len(values):
+      return self.escape(values[0])
+    prefix = os.path.commonprefix(values)
+    rests = [v[len(prefix):] for v in values]
+    suffix = os.path.commonprefix([r[::-1] for r in rests])[::-1]
+    middles = [r[:len(r) - len(suffix)] for r in rests]
+    return (
+      self.escape(prefix) +
+      "{" + ",".join(self.escape(m) for m in middles) + "}" +
+      self.escape(suffix)
+    )
+
+  def escape(self, text):
+    return self.special.sub(r"\\\1", text)
+
+  def expand(self, word):
+    r"""
+    word -> paths, as bash does for words made by render
+    """
+    parts = [[""]]
+    text = []
+    alternatives = None
+    index = 0
+    while index < len(word):
+      c = word[index]
+      if "\\" == c:
+        index += 1
+        text.append(word[index])
+      elif "{" == c and None == alternatives:
+        parts.append(["".join(text)])
+        text = []
+        alternatives = []
+      elif "," == c and None != alternatives:
+        alternatives.append("".join(text))
+        text = []
+      elif "}" == c and None != alternatives:
+        alternatives.append("".join(text))
+        parts.append(alternatives)
+        text = []
+        alternatives = None
+      else:
+        text.append(c)
+      index += 1
+    if None != alternatives:
+      raise ValueError(f"unbalanced brace in {word}")
+    parts.append(["".join(text)])
+    paths = [""]
+    for part in parts:
+      paths = [p + v for p in paths for v in part]
+    return paths
+
+  def verify(self, paths, words):
+    r"""
+    expand words again, and compare with paths exactly
+    raises ValueError when they differ
+    """
+    expanded = [path for word in words for path in self.expand(word)]
+    if len(expanded) != len(set(expanded)) or set(expanded) != set(paths):
+      missing = set(paths) - set(expanded)
+      unexpected = set(expanded) - set(paths)
+      raise ValueError(
+        f"brace expansion mismatch: "
+        f"{len(missing)} missing, {len(unexpected)} unexpected, "
+        f"{len(expanded) - len(set(expanded))} duplicated"
+      )
+    return True
+
+
+r"""
+output writers
+"""
+
+class BufferedStream:
+  r"""
+  text stream with a write buffer in front of a file
+
+  Small writes from explorers are gathered into chunks
+  and passed to the file only when the buffer is full.
+  """
+
+  def __init__(self, file, buffer_size=1 << 16):
+    self._file = file
+    self._buffer_size = buffer_size
+    self._chunks = []
+    self._length = 0
+
+  def write(self, text):
+    self._chunks.append(text)
+    self._length += len(text)
+    if self._length >= self._buffer_size:
+      self.flush()
+
+  def flush(self):
+    if self._chunks:
+      self._file.write("".join(self._chunks))
+      self._chunks = []
+      self._length = 0
+
+
+class Writer(abc.ABC):
+  r"""
+  base class of output backends, a subclass gives open
+
+  Executor opens a stream for each format, then explorers write into it.
+    mkdir    : bash script to create subfolders
+    git_add  : bash script to git add icons
+    scheme   : case list for GIMP Script-Fu
+    scheme.N : shard N of the case list
+    manifest : shards and their expected outputs
+    cases    : flat case list for GIMP Script-Fu
+  """
+
+  file_names = {
+    "mkdir": "mkdir.sh",
+    "git_add": "git_add.sh",
+    "scheme": "icon_list.scm",
+    "manifest": "icon_list.manifest.json",
+    "cases": "icon_cases.scm",
+  }
+
+  def __str__(self):
+    return f"{self.__class__.__name__}()"
+
+  def file_name(self, name):
+    r"""
+    scheme.3 is icon_list.3.scm
+    """
+    if name in self.file_names:
+      return self.file_names[name]
+    base, _, index = name.partition(".")
+    if base not in self.file_names:
+      return name
+    root, ext = os.path.splitext(self.file_names[base])
+    return f"{root}.{index}{ext}"
+
+  @contextlib.contextmanager
+  def stream(self, name):
+    stream = self.open(name)
+    try:
+      yield stream
+    finally:
+      self.close_stream(name, stream)
+
+  @abc.abstractmethod
+  def open(self, name):
+    r"""
+    returns a stream to write the format of name into
+    """
+
+  def close_stream(self, name, stream):
+    pass
+
+  def close(self):
+    pass
+
+
+class StdoutWriter(Writer):
+  r"""
+  writes all formats into stdout, as a single bash script
+
+  formats except mkdir are wrapped in heredoc to be ignored by bash.
+  """
+
+  heredoc = ("git_add", "scheme", "manifest", "cases")
+
+  heredoc_begin = "cat <<'EOS' > /dev/null\n\n"
+  heredoc_end = "\n\nEOS\n      "
+
+  def __init__(self, file=None, buffer_size=1 << 16):
+    self._file = sys.stdout if None == file else file
+    self._buffer_size = buffer_size
+
+  def open(self, name):
+    stream = BufferedStream(self._file, self._buffer_size)
+    if self.in_heredoc(name):
+      stream.write(self.heredoc_begin)
+    return stream
+
+  def in_heredoc(self, name):
+    return name.partition(".")[0] in self.heredoc
+
+  def close_stream(self, name, stream):
+    if self.in_heredoc(name):
+      stream.write(self.heredoc_end)
+    stream.write("\n")
+    stream.flush()
+
+  def close(self):
+    self._file.flush()
+
+
+class DirectoryWriter(Writer):
+  r"""
+  writes each format into its own file in the output directory
+
+  file names are by Writer.file_name, with .gz when compressed.
+  """
+
+  def __init__(self, directory, compress=False):
+    self._directory = directory
+    self._compress = compress
+
+  def __str__(self):
+    return (
+      f"{self.__class__.__name__}("
+      f"directory={self._directory}, "
+      f"compress={self._compress}"
+      f")"
+    )
+
+  def file_name(self, name):
+    file_name = super(self.__class__, self).file_name(name)
+    if self._compress:
+      file_name += ".gz"
+    return file_name
+
+  def path_for(self, name):
+    return os.path.join(self._directory, self.file_name(name))
+
+  def open(self, name):
+    os.makedirs(self._directory, exist_ok=True)
+    path = self.path_for(name)
+    if self._compress:
+      return gzip.open(path, "wt", encoding="utf-8")
+    else:
+      return open(path, "w", encoding="utf-8", buffering=1 << 16)
+
+  def close_stream(self, name, stream):
+    stream.write("\n")
+    stream.close()
+
+
+class MemoryWriter(Writer):
+  r"""
+  keeps each format in memory, for tests and embedded callers
+  """
+
+  def __init__(self):
+    self._values = {}
+
+  def open(self, name):
+    return io.StringIO()
+
+  def close_stream(self, name, stream):
+    self._values[name] = stream.getvalue()
+    stream.close()
+
+  def value(self, name):
+    return self._values.get(name)
+
+  def values(self):
+    return self._values.copy()
+
+
+class Output:
+  r"""
+  where the result goes, used at Executor
+  """
+
+  key_list = ("output", "gzip", "brace", "shards", "export_mode", "flat", "schedule", "log_level", "log_file")
+
+  export_modes = ("each", "pyramid")
+
+  schedules = ("tree", "gray")
+
+  log_levels = ("off", "summary", "per-icon", "debug")
+
+  def __init__(self, output=None, gzip=0, brace=0, shards=0, export_mode="each", flat=0, schedule="tree",
+      log_level=None, log_file=None):
+    if export_mode not in self.export_modes:
+      raise ValueError(f"export_mode should be one of {self.export_modes}: {export_mode}")
+    if schedule not in self.schedules:
+      raise ValueError(f"schedule should be one of {self.schedules}: {schedule}")
+    if None != log_level and log_level not in self.log_levels:
+      raise ValueError(f"log_level should be one of {self.log_levels}: {log_level}")
+    self._output = output
+    self._gzip = gzip
+    self._brace = brace
+    self._shards = shards
+    self._export_mode = export_mode
+    self._flat = flat
+    self._schedule = schedule
+    self._log_level = log_level
+    self._log_file = log_file
+    r"""
+    output: directory to write files, stdout if None
+    gzip: compress files when true
+    brace: group paths into brace expansions in bash scripts when true
+    shards: number of scheme shards with a manifest, none if 0
+    export_mode: how export-android-icons scales icons
+      each: copies visible for each icon
+      pyramid: copies visible once for each outer case,
+        then scales it down through the sizes in descending order
+    flat: also write the flat case list, and shards in it, when true
+    schedule: order of the outer cases
+      tree: as the iterator lists them
+      gray: Gray order, with the layers to toggle between cases
+    log_level: what export-android-icons logs, its default (summary) if None
+    log_file: where export-android-icons logs, its default if None
+    """
+
+  def __str__(self):
+    return (
+      f"{self.__class__.__name__}("
+      f"output={self._output}, "
+      f"gzip={self._gzip}, "
+      f"brace={self._brace}, "
+      f"shards={self._shards}, "
+      f"export_mode={self._export_mode}, "
+      f"flat={self._flat}, "
+      f"schedule={self._schedule}, "
+      f"log_level={self._log_level}, "
+      f"log_file={self._log_file}"
+      f")"
+    )
+
+  @property
+  def brace(self):
+    return bool(self._brace)
+
+  @property
+  def shards(self):
+    return int(self._shards)
+
+  @property
+  def export_mode(self):
+    return self._export_mode
+
+  @property
+  def flat(self):
+    return bool(self._flat)
+
+  @property
+  def schedule(self):
+    return self._schedule
+
+  @property
+  def log_level(self):
+    return self._log_level
+
+  @property
+  def log_file(self):
+    return self._log_file
+
+  def writer(self):
+    if None == self._output:
+      return StdoutWriter()
+    else:
+      return DirectoryWriter(str(self._output), bool(self._gzip))
+
+
+r"""
+visibility schedule
+"""
+
+class VisibilityPlan:
+  r"""
+  order of the outer cases, and the layers to toggle between them
+
+  On GIMP, each outer case hides every layer of iterator-build and
+  iterator-shape, then shows its own; a toggle costs 2 PDB calls,
+  gimp-image-get-layer-by-name and gimp-item-set-visible.
+
+  Ordering the outer cases by a reflected mixed-radix Gray code,
+  consecutive cases differ in one layer key,
+  so only 2 layers are toggled between them after the first case.
+
+    (main square) (main round) (debug round) (debug square) ...
+  """
+
+  calls_per_toggle = 2
+
+  def __init__(self, layer_lists):
+    self._layer_lists = layer_lists
+    r"""
+    layer_lists: layer key -> layer names hidden by the naive order
+    """
+
+  def __str__(self):
+    return f"{self.__class__.__name__}({self._layer_lists})"
+
+  def state(self, node):
+    r"""
+    visible layers of an outer node, as ((key, value), ...)
+    """
+    values = node.attributes.values
+    return tuple((k, values[k]) for k in self._layer_lists if k in values)
+
+  def gray(self, radices):
+    r"""
+    reflected mixed-radix Gray code, digits change by one at each step
+    """
+    codes = [()]
+    for radix in reversed(radices):
+      codes = [
+        (digit,) + code
+        for digit in range(radix)
+        for code in (codes if 0 == digit % 2 else reversed(codes))
+      ]
+    return codes
+
+  def order(self, children):
+    r"""
+    outer nodes in Gray order, by the values of their attributes
+    """
+    if not children:
+      return []
+    keys = list(children[0].attributes.values)
+    values = {k: [] for k in keys}
+    for node in children:
+      for k in keys:
+        if node.attributes.values[k] not in values[k]:
+          values[k].append(node.attributes.values[k])
+    by_digits = {
+      tuple(values[k].index(node.attributes.values[k]) for k in keys): node
+      for node in children
+    }
+    ordered = [by_digits[code] for code in self.gray([len(values[k]) for k in keys]) if code in by_digits]
+    if len(ordered) != len(children):
+      return list(children)
+    return ordered
+    r"""
+    the original order is kept when outer cases are not unique
+    """
+
+  def steps(self, children):
+    r"""
+    (hide, show) for each outer node
+    the first hides all the other layers, as the state of the image is unknown.
+    """
+    steps = []
+    previous = None
+    for node in children:
+      state = self.state(node)
+      if None == previous:
+        shown = dict(state)
+        hide = [name for k, v in state for name in self._layer_lists[k] if name != shown[k]]
+        show = [v for k, v in state]
+      else:
+        before = dict(previous)
+        hide = [before[k] for k, v in state if before.get(k) != v and k in before]
+        show = [v for k, v in state if before.get(k) != v]
+      steps.append((hide, show))
+      previous = state
+    return steps
+
+  def naive_calls(self, children):
+    r"""
+    PDB calls of hiding all and showing one, for each outer node
+    """
+    return sum(
+      self.calls_per_toggle * (len(self._layer_lists[k]) + 1)
+      for node in children for k, v in self.state(node)
+    )
+
+  def planned_calls(self, steps):
+    return sum(self.calls_per_toggle * (len(hide) + len(show)) for hide, show in steps)
+
+  def check(self, dangeon):
+    r"""
+    layers are expected only on the outer floor,
+    export-android-icons toggles them at the outer nodes.
+    """
+    for floor in dangeon[1:]:
+      for k in self._layer_lists:
+        if k in floor:
+          raise ValueError(f"schedule gray needs {k} on the outer floor: {dangeon}")
+
+
+r"""
+up-to-date check
+"""
+
+class Freshness:
+  r"""
+  up-to-date check settings, used at Executor
+  """
+
+  key_list = ("source", "fingerprints", "up_to_date")
+
+  modes = ("check", "record")
+
+  def __init__(self, source=None, fingerprints=None, up_to_date=None):
+    if None != up_to_date and up_to_date not in self.modes:
+      raise ValueError(f"up_to_date should be one of {self.modes}: {up_to_date}")
+    if None != up_to_date and None == source:
+      raise ValueError("up_to_date needs source")
+    self._source = source
+    self._fingerprints = fingerprints
+    self._up_to_date = up_to_date
+    r"""
+    source: image file the icons are exported from
+    fingerprints: sidecar manifest, source + ".fingerprints.json" if None
+    up_to_date: mode, no check if None
+      check: the lists have stale and missing icons only
+      record: fingerprints of the exported icons are recorded
+    """
+
+  def __str__(self):
+    return (
+      f"{self.__class__.__name__}("
+      f"source={self._source}, "
+      f"fingerprints={self._fingerprints}, "
+      f"up_to_date={self._up_to_date}"
+      f")"
+    )
+
+  @property
+  def mode(self):
+    return self._up_to_date
+
+  def manifest(self):
+    fingerprints = self._fingerprints
+    if None == fingerprints:
+      fingerprints = f"{self._source}.fingerprints.json"
+    return FingerprintManifest(str(self._source), str(fingerprints))
+
+
+class FingerprintManifest:
+  r"""
+  fingerprints of exported icons, kept in a sidecar json file
+
+    {"source": "icon.xcf", "outputs": {path: {"fingerprint", "size", "mtime_ns", "sha256"}}}
+
+  A fingerprint is the hash of the source file and the export parameters,
+  which are the attributes of the case (visible layers and size),
+  the export mode and the webp parameters.
+  An icon is fresh when its fingerprint is unchanged and the file is
+  as recorded; by size and mtime, or by the content when only touched.
+
+  Paths are the ones in git_add.sh, made of the hierarchy as given,
+  so project and version should be the real ones.
+  """
+
+  webp_parameters = (("quality", 90), ("alpha_quality", 90), ("lossless", 0))
+  r"""
+  as given to file-webp-save by export-image-as-webp
+  """
+
+  chunk_size = 1 << 20
+
+  def __init__(self, source, path):
+    self._source = source
+    self._path = path
+    self._source_digest = None
+    try:
+      with open(path, encoding="utf-8") as f:
+        self._outputs = json.load(f).get("outputs", {})
+    except FileNotFoundError:
+      self._outputs = {}
+
+  def __str__(self):
+    return f"{self.__class__.__name__}({self._source}, {self._path})"
+
+  def file_digest(self, path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+      for chunk in iter(lambda: f.read(self.chunk_size), b""):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+  def source_digest(self):
+    if None == self._source_digest:
+      self._source_digest = self.file_digest(self._source)
+    return self._source_digest
+
+  def fingerprint(self, case, export_mode):
+    parameters = [
+      self.source_digest(),
+      sorted(case.attributes().items()),
+      export_mode,
+      self.webp_parameters,
+    ]
+    return hashlib.sha256(json.dumps(parameters).encode()).hexdigest()
+
+  def file_state(self, path):
+    r"""
+    (size, mtime_ns), None if missing
+    """
+    try:
+      stat = os.stat(path)
+    except FileNotFoundError:
+      return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+  def fresh(self, path, fingerprint):
+    entry = self._outputs.get(path)
+    if None == entry or fingerprint != entry["fingerprint"]:
+      return False
+    state = self.file_state(path)
+    if None == state or state[0] != entry["size"]:
+      return False
+    if state[1] == entry["mtime_ns"]:
+      return True
+    return self.file_digest(path) == entry["sha256"]
+    r"""
+    the content is read only when the file was touched
+    """
+
+  def stale(self, cases, export_mode):
+    r"""
+    paths of the icons to export, of (path, case) of each icon
+    """
+    return set(
+      path for path, case in cases
+      if not self.fresh(path, self.fingerprint(case, export_mode))
+    )
+
+  def record(self, cases, export_mode):
+    r"""
+    records the icons exported since the last record, returns the number of them
+
+    An icon changed from the recorded file counts as exported.
+    A stale icon left as recorded is not, it is checked again next time.
+    """
+    count = 0
+    for path, case in cases:
+      state = self.file_state(path)
+      if None == state:
+        continue
+      entry = self._outputs.get(path)
+      if None != entry and [entry["size"], entry["mtime_ns"]] == list(state):
+        continue
+      fingerprint = self.fingerprint(case, export_mode)
+      self._outputs[path] = {
+        "fingerprint": fingerprint,
+        "size": state[0],
+        "mtime_ns": state[1],
+        "sha256": self.file_digest(path),
+      }
+      count += 1
+    self.save()
+    return count
+
+  def save(self):
+    tmp_path = f"{self._path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+      json.dump({"source": self._source, "outputs": self._outputs}, f, indent=2)
+    os.replace(tmp_path, self._path)
+
+
+r"""
+on-disk audit
+"""
+
+class Audit:
+  r"""
+  on-disk audit settings, used at Executor
+  """
+
+  key_list = ("audit", "verify", "audit_jobs")
+
+  def __init__(self, audit=0, verify=0, audit_jobs=16):
+    self._audit = audit
+    self._verify = verify
+    self._audit_jobs = audit_jobs
+    r"""
+    audit: audit the icons on disk instead of writing the lists when true
+    verify: verify the sizes of the icons on disk instead of writing the lists when true
+    audit_jobs: number of threads scanning directories or reading headers
+    """
+
+  def __str__(self):
+    return (
+      f"{self.__class__.__name__}("
+      f"audit={self._audit}, "
+      f"verify={self._verify}, "
+      f"audit_jobs={self._audit_jobs}"
+      f")"
+    )
+
+  @property
+  def audit(self):
+    return bool(self._audit)
+
+  @property
+  def verify(self):
+    return bool(self._verify)
+
+  @property
+  def jobs(self):
+    return int(self._audit_jobs)
+
+
+class IconAudit:
+  r"""
+  compares the expected icons with the files on disk
+
+  Expected paths are grouped by directory,
+  and each directory is listed once by os.scandir in a pool of threads,
+  so missing and unexpected files cost a syscall per directory.
+  Only the expected files found are stat'ed, to find empty ones;
+  the listing has their sizes on Windows, one lstat each on POSIX.
+  """
+
+  def __init__(self, paths, jobs=16):
+    self._directories = {}
+    for path in paths:
+      directory, name = os.path.split(path)
+      self._directories.setdefault(directory, set()).add(name)
+    self._jobs = jobs
+    self.missing = []
+    self.unexpected = []
+    self.empty = []
+
+  def __str__(self):
+    return (
+      f"{self.__class__.__name__}("
+      f"directories={len(self._directories)}, "
+      f"missing={len(self.missing)}, "
+      f"unexpected={len(self.unexpected)}, "
+      f"empty={len(self.empty)}"
+      f")"
+    )
+
+  @property
+  def files(self):
+    return sum(len(names) for names in self._directories.values())
+
+  @property
+  def ok(self):
+    return not (self.missing or self.unexpected or self.empty)
+
+  def scan(self, directory, names):
+    r"""
+    returns (missing, unexpected, empty) of a directory
+    """
+    found = set()
+    unexpected = []
+    empty = []
+    try:
+      with os.scandir(directory) as entries:
+        for entry in entries:
+          if not entry.is_file(follow_symlinks=False):
+            continue
+          if entry.name in names:
+            found.add(entry.name)
+            if 0 == entry.stat(follow_symlinks=False).st_size:
+              empty.append(entry.path)
+          else:
+            unexpected.append(entry.path)
+    except (FileNotFoundError, NotADirectoryError):
+      pass
+    missing = [os.path.join(directory, name) for name in names if name not in found]
+    return (missing, unexpected, empty)
+
+  def run(self):
+    items = sorted(self._directories.items())
+    with concurrent.futures.ThreadPoolExecutor(max_workers=self._jobs) as pool:
+      for missing, unexpected, empty in pool.map(lambda item: self.scan(*item), items):
+        self.missing += missing
+        self.unexpected += unexpected
+        self.empty += empty
+    self.missing.sort()
+    self.unexpected.sort()
+    self.empty.sort()
+    return self
+
+  def report(self, file=sys.stdout):
+    r"""
+    a line for each problem, to be read by grep
+    """
+    for label, paths in (("missing", self.missing), ("unexpected", self.unexpected), ("empty", self.empty)):
+      for path in paths:
+        print(f"{label} {path}", file=file)
+
+
+class WebpHeader:
+  r"""
+  width and height of a webp file, from its first 30 bytes
+
+    RIFF size WEBP, then the first chunk
+      "VP8 " lossy: frame tag (3), start code 9d 01 2a, 14 bits width, 14 bits height
+      "VP8L" lossless: signature 2f, 14 bits width - 1, 14 bits height - 1
+      "VP8X" extended: flags (4), 24 bits canvas width - 1, 24 bits canvas height - 1
+
+  No pixel is decoded.
+  """
+
+  length = 30
+
+  def __init__(self, data):
+    if len(data) < self.length or b"RIFF" != data[0:4] or b"WEBP" != data[8:12]:
+      raise ValueError("not a webp file")
+    self.chunk = data[12:16].decode("latin-1")
+    payload = data[20:]
+    if "VP8 " == self.chunk:
+      if b"\x9d\x01\x2a" != payload[3:6]:
+        raise ValueError("bad VP8 start code")
+      self.width = int.from_bytes(payload[6:8], "little") & 0x3fff
+      self.height = int.from_bytes(payload[8:10], "little") & 0x3fff
+    elif "VP8L" == self.chunk:
+      if 0x2f != payload[0]:
+        raise ValueError("bad VP8L signature")
+      bits = int.from_bytes(payload[1:5], "little")
+      self.width = (bits & 0x3fff) + 1
+      self.height = ((bits >> 14) & 0x3fff) + 1
+    elif "VP8X" == self.chunk:
+      self.width = int.from_bytes(payload[4:7], "little") + 1
+      self.height = int.from_bytes(payload[7:10], "little") + 1
+    else:
+      raise ValueError(f"unknown chunk {self.chunk!r}")
+
+  def __str__(self):
+    return f"{self.__class__.__name__}({self.chunk}, {self.width}x{self.height})"
+
+  @classmethod
+  def read(cls, path):
+    with open(path, "rb") as f:
+      return cls(f.read(cls.length))
+
+
+class IconVerifier:
+  r"""
+  compares the sizes in the webp headers with the sizes of the cases
+
+  Icons are square, of the size attribute of their case,
+  which decides the mipmap directory as well.
+  Headers are read in a pool of threads; missing files are left to IconAudit.
+  """
+
+  def __init__(self, cases, jobs=16):
+    self._cases = cases
+    self._jobs = jobs
+    self.verified = 0
+    self.mismatched = []
+    self.unreadable = []
+    r"""
+    cases: (path, size) of each icon
+    mismatched: (path, expected, header)
+    unreadable: (path, reason)
+    """
+
+  def __str__(self):
+    return (
+      f"{self.__class__.__name__}("
+      f"verified={self.verified}, "
+      f"mismatched={len(self.mismatched)}, "
+      f"unreadable={len(self.unreadable)}"
+      f")"
+    )
+
+  @property
+  def ok(self):
+    return not (self.mismatched or self.unreadable)
+
+  def check(self, case):
+    r"""
+    returns (kind, item), kind is None when fine or missing
+    """
+    path, size = case
+    try:
+      header = WebpHeader.read(path)
+    except FileNotFoundError:
+      return (None, None)
+    except (OSError, ValueError) as e:
+      return ("unreadable", (path, str(e)))
+    if (size, size) != (header.width, header.height):
+      return ("mismatched", (path, size, header))
+    return ("verified", None)
+
+  def run(self):
+    with concurrent.futures.ThreadPoolExecutor(max_workers=self._jobs) as pool:
+      for kind, item in pool.map(self.check, self._cases):
+        if "verified" == kind:
+          self.verified += 1
+        elif "mismatched" == kind:
+          self.mismatched.append(item)
+        elif "unreadable" == kind:
+          self.unreadable.append(item)
+    return self
+
+  def report(self, file=sys.stdout):
+    r"""
+    a line for each problem, to be read by grep
+    """
+    for path, size, header in self.mismatched:
+      print(f"mismatched {path} expected {size}x{size} found {header.width}x{header.height}", file=file)
+    for path, reason in self.unreadable:
+      print(f"unreadable {path} {reason}", file=file)
+
+
+r"""
+scheme input
+"""
+
+class SchemeInput:
+  r"""
+  scheme list settings, used at Executor
+  """
+
+  key_list = ("scheme_input", "scheme_check", "scheme_splice")
+
+  def __init__(self, scheme_input=None, scheme_check=None, scheme_splice=None):
+    self._scheme_input = scheme_input
+    self._scheme_check = scheme_check
+    self._scheme_splice = scheme_splice
+    r"""
+    scheme_input: scheme list (icon-list) to read the tree from, instead of building it
+    scheme_check: scheme list to compare with the tree, instead of writing the lists
+    either is a case list written by write_scheme,
+    or a script with the variables block such as export_android_icons.scm.
+    scheme_splice: script to write the variables block into, instead of writing the lists
+    """
+
+  def __str__(self):
+    return (
+      f"{self.__class__.__name__}("
+      f"scheme_input={self._scheme_input}, "
+      f"scheme_check={self._scheme_check}, "
+      f"scheme_splice={self._scheme_splice}"
+      f")"
+    )
+
+  @property
+  def input(self):
+    return None if None == self._scheme_input else str(self._scheme_input)
+
+  @property
+  def check(self):
+    return None if None == self._scheme_check else str(self._scheme_check)
+
+  @property
+  def splice(self):
+    return None if None == self._scheme_splice else str(self._scheme_splice)
+
+
+class SchemeTreeReader:
+  r"""
+  rebuilds the tree from icon-list of a scheme list, read by scheme_reader
+
+    ( #\L ( #\N ( #\A ("build" . "main") ...) ( #\L ... ) ) ...)
+    ( #\H "/home/kuro" "AndroidStudioProjects" ...)
+
+  Segments of #\H are keyed by the hierarchy variable.
+  Segments at the positions named in the arguments variable become Placeholder,
+  so the tree is bound to other project and version as a built one.
+  Contents of HierarchyLeaf have the keys of the hierarchy only,
+  so compare trees by their cases, not by ==.
+  The icon-list is streamed by scheme_reader.stream_list,
+  children yields the outer nodes one by one, never holding the list whole.
+  """
+
+  def __init__(self, path):
+    self._path = path
+    self._variables = None
+
+  def __str__(self):
+    return f"{self.__class__.__name__}({self._path})"
+
+  def variables(self):
+    r"""
+    variables before the list, the file is read only up to the list
+    """
+    if None == self._variables:
+      with open(self._path, encoding="utf-8") as stream:
+        kind, self._variables = next(scheme_reader.stream_list(stream))
+    return self._variables
+
+  def children(self):
+    r"""
+    yields the outer nodes of the tree, converted as they are read
+    """
+    with open(self._path, encoding="utf-8") as stream:
+      events = scheme_reader.stream_list(stream)
+      kind, variables = next(events)
+      self._variables = variables
+      if not isinstance(variables.get("icon-list"), scheme_reader.Streamed):
+        raise ValueError(f"no icon-list in {self._path}, a flat case list is not a tree")
+      key_list = tuple(variables["hierarchy"])
+      arguments = variables.get("arguments") or ()
+      placeholders = {k: Placeholder(a) for k, a in zip(key_list, arguments) if isinstance(a, str)}
+      kind, root = next(events, (None, None))
+      if Nodes.kind != root:
+        raise ValueError(f"not a list of nodes in {self._path}: {root!r}")
+      for kind, value in events:
+        yield self.convert(value, key_list, placeholders)
+
+  def tree(self):
+    return Nodes(list(self.children()))
+
+  def convert(self, value, key_list, placeholders={}):
+    r"""
+    uses an explicit stack as TreeNode.from_legacy does.
+    placeholders: {hierarchy key: Placeholder} put in place of the segments read
+    """
+    results = []
+    stack = [(None, value)]
+    while stack:
+      count, value = stack.pop()
+      if None != count:
+        children = results[len(results) - count:]
+        del results[len(results) - count:]
+        results.append(Nodes(children) if Nodes.kind == value[0] else Node(*children))
+        continue
+      if not isinstance(value, list) or not value or not isinstance(value[0], scheme_reader.Char):
+        raise ValueError(f"not a node in {self._path}: {value!r}"[:200])
+      kind = value[0]
+      if Attributes.kind == kind:
+        results.append(Attributes(value[1:]))
+      elif HierarchyLeaf.kind == kind:
+        contents = dict(zip(key_list, value[1:]))
+        contents.update(placeholders)
+        contents["key_list"] = key_list
+        results.append(HierarchyLeaf(contents))
+      elif kind in (Nodes.kind, Node.kind):
+        stack.append((len(value) - 1, value))
+        for child in reversed(value[1:]):
+          stack.append((None, child))
+      else:
+        raise ValueError(f"unknown node #\\{kind} in {self._path}")
+    return results.pop()
+
+
+class DigestStream:
+  r"""
+  writes through to a stream, and digests what is written
+  """
+
+  def __init__(self, stream):
+    self._stream = stream
+    self._hash = hashlib.sha256()
+
+  def write(self, text):
+    self._hash.update(text.encode("utf-8"))
+    return self._stream.write(text)
+
+  def hexdigest(self):
+    return self._hash.hexdigest()
+
+
+class SchemeSplicer:
+  r"""
+  replaces the variables block of a script, such as export_android_icons.scm
+
+      ; --- variables BEGIN ---
+      (hierarchy ...) ... (icon-list ...) (variables ...)
+      ; --- variables END ---
+
+  The script is copied line by line up to the begin marker,
+  the block is written by write_block, the old block is skipped,
+  and the rest from the end marker is copied in chunks.
+  The script is replaced only when the block has changed,
+  so GIMP does not read an identical script again.
+  """
+
+  chunk_size = 1 << 16
+
+  def __init__(self, path, begin, end):
+    self._path = path
+    self._begin = begin
+    self._end = end
+
+  def __str__(self):
+    return f"{self.__class__.__name__}({self._path})"
+
+  def splice(self, write_block):
+    r"""
+    returns True when the script is replaced
+    raises ValueError when a marker is missing
+    """
+    tmp_path = f"{self._path}.{os.getpid()}.tmp"
+    try:
+      with open(self._path, encoding="utf-8", newline="") as source, \
+          open(tmp_path, "w", encoding="utf-8", newline="") as target:
+        self.copy_until(source, target, self._begin)
+        new_block = DigestStream(target)
+        write_block(new_block)
+        old_block = hashlib.sha256()
+        end_line = self.copy_until(source, None, self._end, old_block)
+        target.write(end_line)
+        shutil.copyfileobj(source, target, self.chunk_size)
+        shutil.copymode(self._path, tmp_path)
+      if new_block.hexdigest() == old_block.hexdigest():
+        os.remove(tmp_path)
+        return False
+      os.replace(tmp_path, self._path)
+      return True
+    except BaseException:
+      if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+      raise
+
+  def copy_until(self, source, target, marker, digest=None):
+    r"""
+    copies lines before the marker line into target, or digests them
+    returns the marker line, which is written when target is given
+    """
+    for line in source:
+      if marker == line.strip():
+        if None != target:
+          target.write(line)
+        return line
+      if None != target:
+        target.write(line)
+      if None != digest:
+        digest.update(line.encode("utf-8"))
+    raise ValueError(f"no {marker} in {self._path}")
+
+
+r"""
+main executor
+"""
+
+class Executor:
+  r"""
+  called from main with command line arguments
+  handles whole processes
+  """
+
+  argument_key = ("project", "version")
+  r"""
+  hierarchy keys replaced by the arguments of export-android-icons on GIMP
+  """
+
+  layer_key = ("build", "shape")
+  r"""
+  attributes made visible as layers on GIMP
+  """
+
+  trees_kept = 16
+  _trees = {}
+  _trees_lock = threading.Lock()
+  r"""
+  trees with Placeholder for argument_key, by the shape of the tree
+  shared by executors, so apps differ only in arguments build no tree.
+  """
 
-{mkdir}
+  def __init__(self, config):
+    self._config = config
+    self._arguments = None
+    #self._args = args    #self.parse_args(args)
+    #self._iterator_args = {k:self.__getattribute__(k) for k in Iterator.key_list if k in self._keys}
+
+  def make_tree(self):
+    r"""
+    build the tree structure
+    """
 
+    iterator = self._config.iterator()
+    if "pyramid" == self._config.output().export_mode:
+      iterator.size = sorted(iterator.size, reverse=True)
+      r"""
+      each size is scaled down from the previous one on GIMP
       """
+    scheme = self._config.scheme_input()
+    if None != scheme.input:
+      tree = SchemeTreeReader(scheme.input).tree()
+      if "pyramid" == self._config.output().export_mode:
+        self.check_pyramid(tree, scheme.input)
+    else:
+      tree = self.shape_tree(iterator, self._config.dangeon())
+    plan = self.visibility_plan()
+    if None != plan:
+      plan.check(self._config.dangeon().dangeon)
+      tree = Nodes(plan.order(tree.children))
+    freshness = self._config.freshness()
+    if "check" == freshness.mode:
+      cases = self.path_cases(tree)
+      stale = freshness.manifest().stale(cases, self._config.output().export_mode)
+      self._freshness_counts = (len(stale), len(cases))
+      tree = self.explorer(PruneExplorer).begin(tree, {"keep": stale})
+    return tree
+
+  def check_pyramid(self, tree, name):
+    r"""
+    raises ValueError when sizes are not in descending order in an outer case
+    a tree read from a file keeps its order, and GIMP scales each icon from the previous one.
+    """
+    outer = None
+    previous = None
+    for case in CaseExplorer().begin(tree, {}):
+      size = case.attributes().get("size")
+      if case.floors[:1] != outer:
+        outer = case.floors[:1]
+        previous = None
+      if None != previous and None != size and previous < size:
+        raise ValueError(f"sizes are not in descending order for pyramid in {name}: {previous} then {size} at {outer}")
+      if None != size:
+        previous = size
+
+  def shape_tree(self, iterator, dangeon):
+    r"""
+    the tree of the shape, with Placeholder for argument_key
+    built once for the same hierarchy (but arguments), iterator and dangeon.
+    """
+    values = self._config.hierarchy().get()
+    values.update({k: Placeholder(k) for k in self.argument_key})
+    key = repr((sorted(values.items()), iterator.__class__.__name__, sorted(vars(iterator).items()), dangeon.dangeon))
+    tree = self._trees.get(key)
+    if None != tree:
+      return tree
+    tree = TreeMaker(Hierarchy(**values), iterator, dangeon).dive()
+    with self._trees_lock:
+      tree = self._trees.setdefault(key, tree)
+      while self.trees_kept < len(self._trees):
+        self._trees.pop(next(iter(self._trees)))
+    return tree
+    r"""
+    trees are not modified once built,
+    reordering and pruning make new nodes.
+    """
+
+  def arguments(self):
+    r"""
+    values of argument_key, by bind or by the hierarchy
+    """
+    if None != self._arguments:
+      return self._arguments
+    hierarchy = self._config.hierarchy()
+    return {k: getattr(hierarchy, k) for k in self.argument_key}
+
+  def bind(self, **arguments):
+    r"""
+    emit for other arguments, with the same tree
+      executor.bind(project="MyApp", version="v2").make_git_add_sh()
+    """
+    self._arguments = dict(self.arguments(), **arguments)
+    return self
+
+  def explorer(self, klass, *args):
+    r"""
+    explorer bound to the arguments
+    """
+    return klass(*args).bind(self.arguments())
+
+  def path_cases(self, tree):
+    r"""
+    (path, case) of each icon
+    """
+    return [(case.path(), case) for case in self.explorer(CaseExplorer).begin(tree, {})]
+
+  def visibility_plan(self):
+    r"""
+    VisibilityPlan at schedule gray, None otherwise
+    """
+    if "gray" != self._config.output().schedule:
+      return None
+    iterator = self._config.iterator()
+    return VisibilityPlan({k: iterator.list_for(k) for k in self.layer_key})
+
+  def write_paths(self, stream, explorer, command, unique=False):
+    r"""
+    write a command line for each path found by the explorer
+    paths are grouped into brace expansions at brace mode.
+    """
+
+    if self._config.output().brace:
+      collector = LineCollector(stream, command)
+      for word in BraceExpansion().compress(explorer.begin(self._tree, {})):
+        collector.push(word)
+    else:
+      explorer.begin(self._tree, {"collector": LineCollector(stream, command, unique=unique)})
+
+  def shebang_sh(self):
+    return "#!/bin/bash" if self._config.output().brace else "#!/bin/sh"
+
+  def write_mkdir_sh(self, stream):
+    r"""
+    write bash script from the tree
+    """
+
+    stream.write(f"{self.shebang_sh()}\n# create directories\n\n")
+    self.write_paths(stream, self.explorer(MkdirExplorer), "mkdir -p ", unique=True)
+    stream.write("\n\n      ")
+
+  def write_git_add_sh(self, stream):
+    r"""
+    write bash script from the tree
+    """
+
+    stream.write(f"{self.shebang_sh()}\n# git add files\n\n")
+    self.write_paths(stream, self.explorer(GitAddExplorer), "git add ")
+    stream.write("\n\n      ")
+
+  def write_scheme(self, stream, tree=None):
+    r"""
+    write scheme list from the tree, or from a part of it
+
+    the let form returns the variables as an alist,
+    read by export-android-icons-batch.
+    """
+
+    if None == tree:
+      tree = self._tree
+    explorer = self.explorer(SchemeExplorer)
+    self.write_scheme_variables(stream, "icon-list",
+      lambda: explorer.begin(tree, {"collector": LineCollector(stream)}),
+      tree
     )
 
-  def make_git_add_sh(self):
+  def write_cases(self, stream, tree=None):
     r"""
-    make bash script from the tree
+    write flat case list from the tree, or from a part of it
+
+    a record for each icon, in the order of the tree;
+      (key (layer ...) width "file name" (dir ...))
+    key changes with the visible layers (build and shape by default).
+    arguments (project and version) in dirs are the symbols to be bound on GIMP.
     """
 
-    explorer = GitAddExplorer()
-    files = explorer.begin(self._tree, {})
-    git_add = "\n".join(
-      (f"git add {d}" for d in files)
+    if None == tree:
+      tree = self._tree
+    collector = LineCollector(stream)
+    self.write_scheme_variables(stream, "case-list",
+      lambda: self.push_cases(collector, tree),
+      tree
     )
 
-    return ("#!/bin/sh"
+  def push_cases(self, collector, tree):
+    margin = " " * 8
+    collector.push(margin + "(")
+    key = -1
+    visible = None
+    for case in self.explorer(CaseExplorer).begin(tree, {}):
+      attributes = case.attributes()
+      layers = tuple(attributes[k] for k in self.layer_key if k in attributes)
+      if layers != visible:
+        key += 1
+        visible = layers
+      hierarchy = case.hierarchy
+      segments = list(
+        k if k in self.argument_key else f'"{hierarchy[k]}"'
+        for k in hierarchy.get("key_list")
+      )
+      layer_string = " ".join(f'"{v}"' for v in layers)
+      dir_string = " ".join(segments[:-1])
+      width = attributes.get("size", 0)
+      collector.push(f"{margin}  ({key} ({layer_string}) {width} {segments[-1]} ({dir_string}))")
+    collector.push(margin + ")")
+
+  def write_scheme_variables(self, stream, list_name, write_list, tree):
+    r"""
+    write the let form of the variables, the list is written by write_list
+    visibility-plan is written for the tree at schedule gray.
+    """
+
+    plan_comment, optional = self.optional_variables(tree)
+    optional_cons = "".join(f"\n      (cons '{k} {k})" for k, v in optional)
+
+    stream.write("#!/usr/bin/env tinyscheme"
       f"""
-# git add files
+; icon list
+{plan_comment}
+  (let
+
+    (
+
+      {self.variables_begin}
+"""
+    )
+    self.write_variables_block(stream, list_name, write_list, optional)
+    stream.write(
+      f"""      {self.variables_end}
 
-{git_add}
+    )
+
+    (list
+      (cons 'hierarchy hierarchy)
+      (cons 'arguments arguments)
+      (cons 'iterator-build iterator-build)
+      (cons 'iterator-shape iterator-shape)
+      (cons 'export-mode export-mode){optional_cons}
+      (cons '{list_name} {list_name})
+    )
+  )
 
       """
     )
 
-  def make_scheme(self):
+  variables_begin = "; --- variables BEGIN ---"
+  variables_end = "; --- variables END ---"
+  r"""
+  markers of the variables block, also in export_android_icons.scm
+  """
+
+  def optional_variables(self, tree):
     r"""
-    make scheme list from the tree
+    returns the plan comment, and (name, value) of variables written only when given,
+    export-android-icons has defaults for them
+    """
+    plan_comment = ""
+    optional = []
+    plan = self.visibility_plan()
+    if None != plan:
+      steps = plan.steps(tree.children)
+      planned = plan.planned_calls(steps)
+      naive = plan.naive_calls(tree.children)
+      plan_comment = f"; visibility plan: {planned} PDB calls, {naive} in the naive order\n"
+      step_lines = "".join(
+        "          ((" + " ".join(f'"{v}"' for v in hide) + ") (" + " ".join(f'"{v}"' for v in show) + "))\n"
+        for hide, show in steps
+      )
+      optional.append(("visibility-plan", f"'(\n{step_lines}        )"))
+    output = self._config.output()
+    if None != output.log_level:
+      optional.append(("log-level", self.scheme_string(output.log_level)))
+    if None != output.log_file:
+      optional.append(("log-file", self.scheme_string(output.log_file)))
+    return plan_comment, optional
+
+  def write_variables_block(self, stream, list_name, write_list, optional, alist=False):
+    r"""
+    write the bindings between the markers, without the marker lines
+    alist binds variables to the alist of them all, for the script to hand over.
     """
-
-    explorer = SchemeExplorer()
-    icon_list = explorer.begin(self._tree, {})
-    icon_list_string = "\n".join(icon_list)
 
     key_list = self._config.hierarchy().key_list
-    argument_key = ("project", "version")
-    argument_list = (f'"{k}"' if k in argument_key else "#f" for k in key_list)
+    argument_list = (f'"{k}"' if k in self.argument_key else "#f" for k in key_list)
     key_list_string = '("' + '" "'.join(key_list) + '")'
     argument_list_string = '(' + ' '.join(argument_list) + ')'
 
@@ -1215,16 +3175,10 @@ class Executor:
     build_list_string = '("' + '" "'.join(build_list) + '")'
     shape_list_string = '("' + '" "'.join(shape_list) + '")'
 
-    return ("#!/usr/bin/env tinyscheme"
-      f"""
-; icon list
-
-  (let
-
-    (
-
-      ; --- variables BEGIN ---
+    optional_variables = "".join(f"\n      ({k}\n        {v}\n      )\n" for k, v in optional)
 
+    stream.write(
+      f"""
       (hierarchy
         '{key_list_string}
       )
@@ -1241,73 +3195,479 @@ class Executor:
         '{shape_list_string}
       )
 
-      (icon-list
-        '
-{icon_list_string}
-      )
+      (export-mode
+        "{self._config.output().export_mode}"
+      )
+{optional_variables}
+      ({list_name}
+        '
+"""
+    )
+    write_list()
+    stream.write("\n      )\n\n")
+    if alist:
+      names = ["hierarchy", "arguments", "iterator-build", "iterator-shape", "export-mode"]
+      names += [k for k, v in optional] + [list_name]
+      conses = "".join(f"\n          (cons '{k} {k})" for k in names)
+      stream.write(f"      (variables\n        (list{conses}\n        )\n      )\n\n")
+
+  def scheme_string(self, text):
+    return '"' + str(text).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+  def split_tree(self, count):
+    r"""
+    split the outer floor into count shards, returns trees
+
+    Each outer case (build x shape by default) prepares its own image on GIMP,
+    so a shard takes whole outer cases.
+    Contiguous runs keep the order of the whole list.
+    """
+    children = self._tree.children
+    count = max(1, min(count, len(children)))
+    size, rest = divmod(len(children), count)
+    shards = []
+    start = 0
+    for index in range(count):
+      end = start + size + (1 if index < rest else 0)
+      shards.append(Nodes(children[start:end]))
+      start = end
+    return shards
+
+  def write_shards(self, writer, count):
+    r"""
+    write each shard as a scheme list, and the manifest of them
+    expected outputs are the paths in git_add.sh,
+    with placeholders such as {project} left for the arguments given on GIMP.
+    """
+    shards = []
+    write = self.write_cases if self._config.output().flat else self.write_scheme
+    placeholders = {k: str(Placeholder(k)) for k in self.argument_key}
+    explorer = GitAddExplorer().bind(placeholders)
+    for index, tree in enumerate(self.split_tree(count)):
+      name = f"scheme.{index}"
+      with writer.stream(name) as stream:
+        write(stream, tree)
+      outputs = list(explorer.begin(tree, {}))
+      shards.append({
+        "index": index,
+        "file": writer.file_name(name),
+        "cases": len(tree.children),
+        "outputs": outputs,
+      })
+    manifest = {
+      "arguments": self.arguments(),
+      "placeholders": placeholders,
+      "shards": shards,
+      "outputs": sum(len(shard["outputs"]) for shard in shards),
+    }
+    with writer.stream("manifest") as stream:
+      json.dump(manifest, stream, indent=2)
+
+  def make_string(self, write):
+    r"""
+    returns a string written by write_* method
+    """
+    stream = io.StringIO()
+    write(stream)
+    return stream.getvalue()
+
+  def make_mkdir_sh(self):
+    return self.make_string(self.write_mkdir_sh)
+
+  def make_git_add_sh(self):
+    return self.make_string(self.write_git_add_sh)
+
+  def make_scheme(self):
+    return self.make_string(self.write_scheme)
+
+  def make_cases(self):
+    return self.make_string(self.write_cases)
+
+  def report(self, writer=None):
+    r"""
+    write the result through the writer, stdout by default
+    """
+    if None == writer:
+      writer = self._config.output().writer()
+    with writer.stream("mkdir") as stream:
+      self.write_mkdir_sh(stream)
+    with writer.stream("git_add") as stream:
+      self.write_git_add_sh(stream)
+    with writer.stream("scheme") as stream:
+      self.write_scheme(stream)
+    if self._config.output().flat:
+      with writer.stream("cases") as stream:
+        self.write_cases(stream)
+    if self._config.output().shards:
+      self.write_shards(writer, self._config.output().shards)
+    writer.close()
+
+  def audit_icons(self, file=sys.stdout):
+    r"""
+    report the icons on disk against the paths in git_add.sh
+    """
+    audit = IconAudit(self.explorer(GitAddExplorer).begin(self._tree, {}), self._config.audit().jobs).run()
+    audit.report(file)
+    return audit
+
+  def check_scheme(self, path, file=sys.stdout):
+    r"""
+    compare the tree with the one read from a scheme list, case by case
+    the list is compared one outer node at a time, as it is read.
+    returns True when equal
+    """
+    def cases(node):
+      return [
+        (case.floors, [str(segment) for segment in case.segments()])
+        for case in self.explorer(CaseExplorer).begin(Nodes([node]), {})
+      ]
+    expected_children = self._tree.children
+    count = 0
+    index = 0
+    for count, child in enumerate(SchemeTreeReader(path).children(), 1):
+      if len(expected_children) < count:
+        print(f"different number of outer nodes: expected {len(expected_children)}, found more", file=file)
+        return False
+      expected = cases(expected_children[count - 1])
+      found = cases(child)
+      for a, b in zip(expected, found):
+        if a != b:
+          print(f"different at icon {index}: expected {a}, found {b}", file=file)
+          return False
+        index += 1
+      if len(expected) != len(found):
+        print(f"different number of icons in outer node {count - 1}: expected {len(expected)}, found {len(found)}", file=file)
+        return False
+    if len(expected_children) != count:
+      print(f"different number of outer nodes: expected {len(expected_children)}, found {count}", file=file)
+      return False
+    return True
+
+  def splice_scheme(self, path):
+    r"""
+    write the variables block into a script, between the markers
+    the block binds variables, the alist handed over by the script.
+    returns True when the script is replaced
+    """
+    tree = self._tree
+    list_name = "case-list" if self._config.output().flat else "icon-list"
+    if "case-list" == list_name:
+      collector_list = lambda stream: self.push_cases(LineCollector(stream), tree)
+    else:
+      explorer = self.explorer(SchemeExplorer)
+      collector_list = lambda stream: explorer.begin(tree, {"collector": LineCollector(stream)})
+    plan_comment, optional = self.optional_variables(tree)
+    splicer = SchemeSplicer(path, self.variables_begin, self.variables_end)
+    return splicer.splice(
+      lambda stream: self.write_variables_block(stream, list_name, lambda: collector_list(stream), optional, alist=True)
+    )
+
+  def verify_icons(self, file=sys.stdout):
+    r"""
+    report the icons on disk of a wrong size
+    """
+    cases = (
+      (path, case.attributes().get("size"))
+      for path, case in self.path_cases(self._tree)
+    )
+    verifier = IconVerifier(cases, self._config.audit().jobs).run()
+    verifier.report(file)
+    return verifier
+
+  def verbose(self, file=sys.stdout):
+    r"""
+    print verbose information
+    """
+    #print(self._args)
+    #print(self._keys)
+    #print({k: self.__getattribute__(k) for k in self._keys})
+    #print(self._iterator_args)
+    print(self._config)
+    print(self._tree)
+
+  def run(self, writer=None):
+    r"""
+    handle entire processes
+    """
+    print('Begin.', file=sys.stderr)
+
+    self._tree = self.make_tree()
+    self.ok = True
+    settings = self._config.audit()
+    scheme = self._config.scheme_input()
+    if None != scheme.splice:
+      changed = self.splice_scheme(scheme.splice)
+      print(f"scheme splice: {scheme.splice} is {'replaced' if changed else 'unchanged'}", file=sys.stderr)
+      print('Done!', file=sys.stderr)
+      return
+    if settings.audit or settings.verify or None != scheme.check:
+      if None != scheme.check:
+        equal = self.check_scheme(scheme.check)
+        print(f"scheme check: {scheme.check} is {'equal to' if equal else 'different from'} the tree", file=sys.stderr)
+        self.ok = self.ok and equal
+      if settings.audit:
+        audit = self.audit_icons()
+        print(f"audit: {audit}, files={audit.files}", file=sys.stderr)
+        self.ok = self.ok and audit.ok
+      if settings.verify:
+        verifier = self.verify_icons()
+        print(f"verify: {verifier}", file=sys.stderr)
+        self.ok = self.ok and verifier.ok
+      print('Done!', file=sys.stderr)
+      return
+    self.report(writer)
+
+    freshness = self._config.freshness()
+    if "check" == freshness.mode:
+      print("up to date: %d of %d icons to export" % self._freshness_counts, file=sys.stderr)
+    elif "record" == freshness.mode:
+      count = freshness.manifest().record(self.path_cases(self._tree), self._config.output().export_mode)
+      print(f"up to date: {count} icons recorded", file=sys.stderr)
+
+    plan = self.visibility_plan()
+    if None != plan:
+      steps = plan.steps(self._tree.children)
+      print(f"visibility plan: {plan.planned_calls(steps)} PDB calls, {plan.naive_calls(self._tree.children)} in the naive order", file=sys.stderr)
+
+    #self.verbose(sys.stderr)
+    print('Done!', file=sys.stderr)
+
+
+
+r"""
+server mode
+"""
+
+class Service:
+  r"""
+  server mode settings, used at main
+  """
+
+  key_list = ("serve", "workers")
+
+  def __init__(self, serve=None, workers=4):
+    self._serve = serve
+    self._workers = workers
+    r"""
+    serve: host:port, port, or unix socket path. not a server if None
+    workers: size of the worker pool
+    """
+
+  def __str__(self):
+    return (
+      f"{self.__class__.__name__}("
+      f"serve={self._serve}, "
+      f"workers={self._workers}"
+      f")"
+    )
+
+  @property
+  def address(self):
+    return None if None == self._serve else str(self._serve)
+
+  @property
+  def workers(self):
+    return int(self._workers)
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+  r"""
+  ThreadingHTTPServer on a unix socket
+  """
+
+  daemon_threads = True
+
+
+class ThreadingHTTPServerV6(ThreadingHTTPServer):
+  r"""
+  ThreadingHTTPServer on IPv6, [::1]:8081
+  """
+
+  address_family = socket.AF_INET6
+
+
+class GeneratorRequestHandler(BaseHTTPRequestHandler):
+  r"""
+  accepts a config request, and returns all outputs as JSON
+
+    GET /generate?config=ConfigTest&size=96,144
+    POST /generate {"config": "ConfigTest", "size": [96, 144]}
+
+  keys are names of command line args without --.
+  """
 
-      ; --- variables END ---
+  paths = ("/", "/generate")
 
-    )
+  def do_GET(self):
+    url = urllib.parse.urlsplit(self.path)
+    if url.path not in self.paths:
+      return self.send_json(404, {"error": f"not found: {url.path}"})
+    params = {k: v[-1] for k, v in urllib.parse.parse_qs(url.query).items()}
+    self.respond(params)
 
-    hierarchy
-    arguments
-    iterator-build
-    iterator-shape
-    icon-list
-  )
+  def do_POST(self):
+    url = urllib.parse.urlsplit(self.path)
+    if url.path not in self.paths:
+      return self.send_json(404, {"error": f"not found: {url.path}"})
+    length = int(self.headers.get("Content-Length") or 0)
+    try:
+      params = json.loads(self.rfile.read(length) or b"{}")
+    except ValueError as e:
+      return self.send_json(400, {"error": f"bad json: {e}"})
+    if not isinstance(params, dict):
+      return self.send_json(400, {"error": "expects a json object"})
+    self.respond(params)
+
+  def respond(self, params):
+    try:
+      result = self.server.service.generate(params)
+    except ValueError as e:
+      return self.send_json(400, {"error": str(e)})
+    except Exception as e:
+      return self.send_json(500, {"error": f"{e.__class__.__name__}: {e}"})
+    self.send_json(200, result)
+
+  def send_json(self, status, obj):
+    body = json.dumps(obj).encode("utf-8")
+    self.send_response(status)
+    self.send_header("Content-Type", "application/json")
+    self.send_header("Content-Length", str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def address_string(self):
+    return self.client_address[0] if self.client_address else "unix"
+
+
+class GeneratorService:
+  r"""
+  long running generator, keeps the module and caches warm
 
-      """
-    )
+  requests are computed at a bounded worker pool.
+  identical requests at the same time share one computation.
+  """
 
-  def wrap_in_bash(self, string):
-    r"""
-    include the scheme list in the bash script
-    """
+  excluded = ("serve", "workers", "output", "gzip", "source", "fingerprints", "up_to_date", "audit", "verify", "audit_jobs", "scheme_input", "scheme_check", "scheme_splice", "profile", "profile_dir", "log_file")
+  r"""
+  keys not accepted from requests
+  files on the host are chosen at startup only, profiles as well.
+  """
 
-    return ("cat <<'EOS' > /dev/null"
-      f"""
+  inherited = ("config", "profile", "profile_dir", "log_file")
+  r"""
+  excluded keys taken over from the startup args by every request
+  others excluded, such as up_to_date and scheme_input, are not run for requests.
+  """
 
-{string}
+  choices = {
+    "export_mode": Output.export_modes,
+    "schedule": Output.schedules,
+    "log_level": Output.log_levels,
+  }
 
-EOS
-      """
-    )
+  max_shards = 64
 
-  def report(self):
+  def __init__(self, config_class=None, workers=4, args=None):
+    self._config_class = Config1 if None == config_class else config_class
+    self._argv = self.startup_argv({} if None == args else args)
     r"""
-    print the result to stdout
+    args: explicit args at startup, args of a request follow and overwrite them
     """
-    print(self._sh)
-    print(self.wrap_in_bash(self._sh_git_add))
-    print(self.wrap_in_bash(self._scheme))
+    self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    self._lock = threading.RLock()
+    self._inflight = {}
 
-  def verbose(self, file=sys.stdout):
+  def startup_argv(self, args):
     r"""
-    print verbose information
+    {"config": "ConfigTest", "serve": "8081"} -> ["--config=ConfigTest"]
     """
-    #print(self._args)
-    #print(self._keys)
-    #print({k: self.__getattribute__(k) for k in self._keys})
-    #print(self._iterator_args)
-    print(self._config)
-    print(self._tree)
+    return [
+      f"--{k}={v}" for k, v in args.items()
+      if k not in self.excluded or k in self.inherited
+    ]
 
-  def run(self):
+  def check(self, k, v):
     r"""
-    handle entire processes
+    raises ValueError for a key or a value not accepted from requests
     """
-    print('Begin.', file=sys.stderr)
-
-    self._tree = self.make_tree()
-    self._sh = self.make_mkdir_sh()
-    self._sh_git_add = self.make_git_add_sh()
-    self._scheme = self.make_scheme()
-    self.report()
-
-    #self.verbose(sys.stderr)
-    print('Done!', file=sys.stderr)
+    if k in self.excluded:
+      raise ValueError(f"not accepted: {k}")
+    if k in self.choices and v not in self.choices[k]:
+      raise ValueError(f"{k} should be one of {self.choices[k]}: {v}")
+    if "shards" == k and not (str(v).isdigit() and int(v) <= self.max_shards):
+      raise ValueError(f"shards should be 0 to {self.max_shards}: {v}")
+
+  def argv(self, params):
+    r"""
+    {"size": [96, 144]} -> ["--size", "96,144"]
+    """
+    argv = []
+    for k, v in params.items():
+      self.check(k, v)
+      if isinstance(v, (list, tuple)):
+        if all(not isinstance(x, (list, tuple)) for x in v):
+          v = ",".join(str(x) for x in v)
+        else:
+          v = json.dumps(v)
+      argv += [f"--{k}", str(v)]
+    return argv
+
+  def generate(self, params):
+    key = json.dumps(params, sort_keys=True)
+    with self._lock:
+      future = self._inflight.get(key)
+      if None == future:
+        future = self._pool.submit(self.compute, params)
+        self._inflight[key] = future
+        future.add_done_callback(lambda f: self.done(key))
+    return future.result()
+
+  def done(self, key):
+    with self._lock:
+      self._inflight.pop(key, None)
+
+  def compute(self, params):
+    try:
+      config = self._config_class.load(self._argv + self.argv(params))
+    except SystemExit:
+      raise ValueError(f"bad arguments: {params}")
+    executor = Executor(config)
+    executor._tree = executor.make_tree()
+    writer = MemoryWriter()
+    executor.report(writer)
+    return writer.values()
+
+  @staticmethod
+  def server_address(address):
+    r"""
+    (server class, host, port) of host:port, [v6 host]:port or port
+    """
+    host, _, port = address.rpartition(":")
+    if host.startswith("[") and host.endswith("]"):
+      return (ThreadingHTTPServerV6, host[1:-1], int(port))
+    return (ThreadingHTTPServer, host or "127.0.0.1", int(port))
 
+  def serve(self, address):
+    r"""
+    serve until interrupted
+    address is host:port or port for TCP, a path for unix socket.
+    """
+    if "/" in address or address.endswith(".sock"):
+      if os.path.exists(address):
+        os.remove(address)
+      server = ThreadingUnixHTTPServer(address, GeneratorRequestHandler)
+    else:
+      klass, host, port = self.server_address(address)
+      server = klass((host, port), GeneratorRequestHandler)
+    server.service = self
+    print(f"serving at {address}", file=sys.stderr)
+    try:
+      server.serve_forever()
+    except KeyboardInterrupt:
+      pass
+    finally:
+      server.server_close()
+      self._pool.shutdown()
 
 
 r"""
@@ -1324,14 +3684,30 @@ class ConfigBase:
 
   @classmethod
   def class_by_name(cls, name):
-    return getattr(__import__(__name__), name)
-
-  def __init__(self, argv=sys.argv):
-    self._argv = argv
-    self._config = None # will be set at next line
-    parse_known_config = self.parse_args_config(argv)
-    self._arg_config = parse_known_config[0]  # --config only
-    self._args = self.parse_args(parse_known_config[1]) # excluding --config
+    r"""
+    only a subclass of ConfigBase is selected
+    raises ValueError for other names, as --config may come from a request
+    """
+    klass = getattr(sys.modules[__name__], str(name), None)
+    if not (isinstance(klass, type) and issubclass(klass, ConfigBase)):
+      raise ValueError(f"not a config class: {name}")
+    return klass
+
+  @classmethod
+  def load(cls, argv=None):
+    r"""
+    parse argv once, and returns the config selected by --config
+    argv excludes the program name, sys.argv[1:] if None.
+    """
+    return cls(argv).config()
+
+  def __init__(self, argv=None, args=None):
+    self._argv = sys.argv[1:] if None == argv else list(argv)
+    self._config = self.scan_config(self._argv)
+    self._args = self.parse_args(self._argv) if None == args else args
+    r"""
+    args is given when the parsed args are handed over by config()
+    """
     self._effective_args = self.effective_args(self._args)
     r"""
     effective args are applied in following order
@@ -1340,6 +3716,11 @@ class ConfigBase:
     self._dangeon = self.dangen_args(self._tmp_args)
     self._iterator = self.iterator_args(self._tmp_args)
     self._hierarchy = self.hierarchy_args(self._tmp_args)
+    self._output = self.output_args(self._tmp_args)
+    self._service = self.service_args(self._tmp_args)
+    self._freshness = self.freshness_args(self._tmp_args)
+    self._audit = self.audit_args(self._tmp_args)
+    self._scheme_input = self.scheme_input_args(self._tmp_args)
 
   def __str__(self):
     return (
@@ -1351,16 +3732,33 @@ class ConfigBase:
   def parser(self):
     return argparse.ArgumentParser(prog=Document.prog, description=Document.description, epilog=Document.epilog)
 
-  def parse_args_config(self, argv):
-    parser = self.parser()
-    parser.add_argument("--config", help="1st, parse only config to catch changing the world")
-    args = parser.parse_known_args()
-    self._config = args[0].config
-    return args
+  def scan_config(self, argv):
+    r"""
+    find --config before building the parser
+    --profile without --config selects ConfigProfile.
+    """
+    config = self.scan_option(argv, "--config")
+    if None == config and None != self.scan_option(argv, "--profile"):
+      config = "ConfigProfile"
+    return config
+
+  def scan_option(self, argv, option):
+    r"""
+    find an option value without the parser, the last one wins
+    both of `--option value` and `--option=value` are accepted.
+    """
+    value = None
+    for index, arg in enumerate(argv):
+      if "--" == arg:
+        break
+      elif option == arg and index + 1 < len(argv):
+        value = argv[index + 1]
+      elif arg.startswith(option + "="):
+        value = arg[len(option) + 1:]
+    return value
 
   def parse_args(self, argv):
     parser = self.parser()
-    #print(self.config_class)
     for k,d,e in self.config_class().arguments:
       parser.add_argument(k, help=f"{d} ({e})")
     return parser.parse_args(argv)
@@ -1371,6 +3769,12 @@ class ConfigBase:
     """
     return {k:v for k,v in args.__dict__.items() if None != v}
 
+  def explicit_args(self):
+    r"""
+    {key: string} of args given at command line
+    """
+    return dict(self._effective_args)
+
   def dangen_args(self, args):
     return self.pick_args_for_class(Dangeon, args)
 
@@ -1380,6 +3784,21 @@ class ConfigBase:
   def hierarchy_args(self, args):
     return self.pick_args_for_class(HierarchyDefault, args)
 
+  def output_args(self, args):
+    return self.pick_args_for_class(Output, args)
+
+  def service_args(self, args):
+    return self.pick_args_for_class(Service, args)
+
+  def freshness_args(self, args):
+    return self.pick_args_for_class(Freshness, args)
+
+  def audit_args(self, args):
+    return self.pick_args_for_class(Audit, args)
+
+  def scheme_input_args(self, args):
+    return self.pick_args_for_class(SchemeInput, args)
+
   def class_key_list(self, klass):
     r"""
     override this if customized key_list is needed.
@@ -1393,37 +3812,68 @@ class ConfigBase:
     remvoe those keys from the temporary dictionary
     """
     key_list = self.class_key_list(klass)
-    good_args = {k:self.parse_arg_string(v) for k,v in args.items() if k in key_list}
+    parse = self.parse_arg_string if klass in self.list_classes else self.parse_scalar_string
+    good_args = {k:parse(v) for k,v in args.items() if k in key_list}
     for k in tuple(args.keys()):
       if k in key_list:
         args.pop(k)
     return good_args
 
+  list_classes = (Dangeon, Iterator, HierarchyDefault)
+  r"""
+  classes whose args are lists, such as --size 48,96 and --dangeon "[['build'], ['size']]"
+  args of others are paths, addresses and flags, a comma or a bracket is kept as is.
+  """
+
+  list_pattern = re.compile(r"\s*[\[(]")
+  r"""
+  formatted list, parsed as python literal
+  """
+
+  number_list_pattern = re.compile(r"[0-9,]+")
+  r"""
+  comma separated numbers, others are strings
+  """
+
   def parse_arg_string(self, obj):
     r"""
     handles list parameters
     1,2,3 -> (1,2,3)
     a,b,c -> ("a","b","c")
     ("a","b") -> as is
+    single item is not a tuple, 96 -> 96, a -> "a"
+    a trailing comma makes a tuple, 96, -> (96,)
+
+    only literals are accepted, nothing is evaluated.
     """
 
     if isinstance(obj, str):
-      if re.search("[\[(]", obj):
-        r"""
-        expects formatted string that can directly eval
-        """
-        list_str = obj
-      else:
-        quote = '"' if re.search("[^,0-9]", obj) else ""
-        splitted = re.split(",", obj)
-        list_str = f"({quote}" + f"{quote},{quote}".join(splitted) + f"{quote})"
-      return eval(list_str)
+      trailing = obj.endswith(",")
+      try:
+        if self.list_pattern.match(obj):
+          return ast.literal_eval(obj)
+        items = (obj[:-1] if trailing else obj).split(",")
+        if self.number_list_pattern.fullmatch(obj):
+          items = [int(item) for item in items]
+      except (ValueError, SyntaxError) as e:
+        raise ValueError(f"can not parse argument: {obj}") from e
+      return items[0] if 1 == len(items) and not trailing else tuple(items)
     else:
       r"""
       expects `None`
       """
       return obj
 
+  def parse_scalar_string(self, obj):
+    r"""
+    handles other parameters
+    digits are a number for flags and counts, 1 -> 1
+    others are as is, out,v2 -> "out,v2", [::1]:8081 -> "[::1]:8081"
+    """
+    if isinstance(obj, str) and obj.isdigit():
+      return int(obj)
+    return obj
+
   def divide_list_by_keys(self, keys, list):
     r"""
     expects dict.items() as list
@@ -1463,8 +3913,10 @@ class ConfigBase:
   def config(self):
     r"""
     executor must use this instead of self
+    the config selected by --config takes over the parsed args.
     """
-    return self if None == self._config else self.__class__.class_by_name(self._config)(self._args)
+    klass = self.config_class()
+    return self if klass == self.__class__ else klass(self._argv, self._args)
 
   def hierarchy(self):
     return Hierarchy(**(self._hierarchy))
@@ -1475,6 +3927,21 @@ class ConfigBase:
   def dangeon(self):
     return Dangeon(**(self._dangeon))
 
+  def output(self):
+    return Output(**(self._output))
+
+  def service(self):
+    return Service(**(self._service))
+
+  def freshness(self):
+    return Freshness(**(self._freshness))
+
+  def audit(self):
+    return Audit(**(self._audit))
+
+  def scheme_input(self):
+    return SchemeInput(**(self._scheme_input))
+
 
 class ConfigDefault(ConfigBase):
   r"""
@@ -1527,15 +3994,309 @@ class Config1(ConfigBase):
     return Iterator(**merged)
 
 
+class ConfigProfile(ConfigBase):
+  r"""
+  config by a profile file instead of a python subclass
+
+  --profile is a file, or a name of file in --profile_dir.
+  values in the profile are defaults, command line args overwrite them.
+  """
+
+  profile_dir = "profiles"
+
+  def profile(self):
+    if None == self.__dict__.get("_profile"):
+      name = self._effective_args.get("profile")
+      directory = self._effective_args.get("profile_dir", self.profile_dir)
+      self._profile = ProfileDirectory.of(directory).load(name)
+    return self._profile
+
+  def hierarchy(self):
+    merged = self.merge_dicts(self.profile().hierarchy, self._hierarchy)
+    return Hierarchy(**merged)
+
+  def iterator(self):
+    merged = self.merge_dicts(self.profile().iterator, self._iterator)
+    return TableIterator(self.profile().mipmap, self.profile().icon_name, **merged)
+
+  def dangeon(self):
+    merged = self.merge_dicts(self.profile().dangeon, self._dangeon)
+    return Dangeon(**merged)
+
+
+r"""
+profiles
+"""
+
+class Profile:
+  r"""
+  declarative config in a TOML or JSON file
+
+    [hierarchy]   # defaults for Hierarchy
+    user_home = "/home/kuro"
+    project = "angulatus"
+
+    [iterator]    # lists for Iterator
+    build = ["main", "debug"]
+    size = [48, 72, 96, 144, 192]
+    shape = ["square", "round"]
+
+    dangeon = [["build", "shape"], ["size"]]   # map for Dangeon, top level
+
+    [mipmap]      # size -> mipmap directory
+    48 = "mipmap-mdpi"
+
+    [icon_name]   # shape -> icon file name
+    round = "ic_launcher_round.webp"
+
+  The file is loaded and validated once.
+  The resolved form is cached next to the file as JSON, keyed by mtime.
+  """
+
+  sections = ("hierarchy", "iterator", "dangeon", "mipmap", "icon_name")
+
+  cache_version = 1
+
+  _loaded = {}
+  _loaded_lock = threading.Lock()
+  r"""
+  path -> (stamp, profile), cache in this process
+  guarded by the lock, read by threads of the service
+  """
+
+  @classmethod
+  def stamp(cls, path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+  @classmethod
+  def cache_path(cls, path):
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}.cache.json")
+
+  @classmethod
+  def load(cls, path):
+    stamp = cls.stamp(path)
+    with cls._loaded_lock:
+      loaded = cls._loaded.get(path)
+    if None != loaded and loaded[0] == stamp:
+      return loaded[1]
+    resolved = cls.read_cache(path, stamp)
+    if None == resolved:
+      resolved = cls.resolve(cls.parse(path), path)
+      cls.write_cache(path, stamp, resolved)
+    profile = cls(path, resolved)
+    with cls._loaded_lock:
+      cls._loaded[path] = (stamp, profile)
+    return profile
+
+  @classmethod
+  def parse(cls, path):
+    if path.endswith(".toml"):
+      if None == tomllib:
+        raise ValueError(f"TOML profile requires python 3.11 or later: {path}")
+      with open(path, "rb") as file:
+        return tomllib.load(file)
+    else:
+      with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+  @classmethod
+  def read_cache(cls, path, stamp):
+    try:
+      with open(cls.cache_path(path), "r", encoding="utf-8") as file:
+        cache = json.load(file)
+    except (OSError, ValueError):
+      return None
+    if cache.get("version") == cls.cache_version and cache.get("stamp") == stamp:
+      return cache.get("profile")
+    return None
+
+  @classmethod
+  def write_cache(cls, path, stamp, resolved):
+    r"""
+    best effort, a read only directory just goes without the cache
+    """
+    cache_path = cls.cache_path(path)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    cache = {"version": cls.cache_version, "stamp": stamp, "profile": resolved}
+    try:
+      with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(cache, file)
+      os.replace(tmp_path, cache_path)
+    except OSError:
+      pass
+
+  @classmethod
+  def resolve(cls, data, path=""):
+    r"""
+    validate the parsed profile, and convert it to the resolved form
+    raises ValueError for a bad profile
+    """
+
+    def fail(message):
+      raise ValueError(f"bad profile {path}: {message}")
+
+    unknown = [k for k in data if k not in cls.sections]
+    if unknown:
+      fail(f"unknown sections {unknown}")
+
+    hierarchy_keys = Hierarchy().get().keys()
+    hierarchy = dict(data.get("hierarchy", {}))
+    unknown = [k for k in hierarchy if k not in hierarchy_keys]
+    if unknown:
+      fail(f"unknown hierarchy keys {unknown}")
+    if "key_list" in hierarchy:
+      hierarchy["key_list"] = list(hierarchy["key_list"])
+      missing = [k for k in hierarchy["key_list"] if k not in hierarchy_keys]
+      if missing:
+        fail(f"key_list has keys without values {missing}")
+
+    iterator = {}
+    for k, v in data.get("iterator", {}).items():
+      if k not in Iterator.key_list:
+        fail(f"unknown iterator key {k}")
+      iterator[k] = list(Iterator.to_iterable(v))
+    if "size" in iterator:
+      if not all(isinstance(x, int) for x in iterator["size"]):
+        fail("iterator size must be integers")
+
+    dangeon = {}
+    if "dangeon" in data:
+      floors = [list(floor) for floor in data["dangeon"]]
+      rooms = [room for floor in floors for room in floor]
+      unknown = [room for room in rooms if room not in Iterator.key_list]
+      if unknown:
+        fail(f"unknown rooms in dangeon {unknown}")
+      dangeon["dangeon"] = floors
+
+    mipmap = {}
+    for k, v in data.get("mipmap", {}).items():
+      try:
+        mipmap[str(int(k))] = str(v)
+      except ValueError:
+        fail(f"mipmap key must be a size {k}")
+
+    icon_name = {str(k): str(v) for k, v in data.get("icon_name", {}).items()}
+
+    return {
+      "hierarchy": hierarchy,
+      "iterator": iterator,
+      "dangeon": dangeon,
+      "mipmap": mipmap,
+      "icon_name": icon_name,
+    }
+
+  def __init__(self, path, resolved):
+    self._path = path
+    self._resolved = resolved
+
+  def __str__(self):
+    return f"{self.__class__.__name__}({self._path})"
+
+  @property
+  def hierarchy(self):
+    return dict(self._resolved["hierarchy"])
+
+  @property
+  def iterator(self):
+    return dict(self._resolved["iterator"])
+
+  @property
+  def dangeon(self):
+    return dict(self._resolved["dangeon"])
+
+  @property
+  def mipmap(self):
+    return self._resolved["mipmap"]
+
+  @property
+  def icon_name(self):
+    return self._resolved["icon_name"]
+
+
+class ProfileDirectory:
+  r"""
+  directory of profile files, scanned lazily
+
+  the directory is listed at the first lookup by name,
+  and listed again when its mtime changes, as a profile is added to it.
+  a path to an existing file is loaded without scanning.
+  """
+
+  extensions = (".toml", ".json")
+
+  _directories = {}
+  _lock = threading.Lock()
+  r"""
+  guards _directories and the listings, read by threads of the service
+  """
+
+  @classmethod
+  def of(cls, directory):
+    with cls._lock:
+      if directory not in cls._directories:
+        cls._directories[directory] = cls(directory)
+      return cls._directories[directory]
+
+  def __init__(self, directory):
+    self._directory = directory
+    self._listing = None
+    r"""
+    (st_mtime_ns of the directory, name -> path)
+    """
+
+  def __str__(self):
+    return f"{self.__class__.__name__}({self._directory})"
+
+  def paths(self):
+    r"""
+    name -> path of files in the directory
+    """
+    stamp = os.stat(self._directory).st_mtime_ns
+    with self._lock:
+      listing = self._listing
+    if None != listing and listing[0] == stamp:
+      return listing[1]
+    paths = {}
+    with os.scandir(self._directory) as entries:
+      for entry in entries:
+        stem, extension = os.path.splitext(entry.name)
+        if extension in self.extensions and not entry.name.startswith(".") and entry.is_file():
+          paths.setdefault(stem, entry.path)
+    with self._lock:
+      self._listing = (stamp, paths)
+    return paths
+
+  def find(self, name):
+    if None == name:
+      raise ValueError("profile is not given")
+    if name.endswith(self.extensions) and os.path.isfile(name):
+      return name
+    path = self.paths().get(name)
+    if None == path:
+      raise ValueError(f"profile not found: {name} in {self._directory}")
+    return path
+
+  def load(self, name):
+    return Profile.load(self.find(name))
+
+
 r"""
 main to be executed
 """
 
 def main():
-  config = Config1()
-  #config = ConfigDefault()
-  project = Executor(config.config())
-  project.run()
+  config = Config1.load()
+  #config = ConfigDefault.load()
+  service = config.service()
+  if None != service.address:
+    GeneratorService(config.config_class(), service.workers, config.explicit_args()).serve(service.address)
+  else:
+    project = Executor(config)
+    project.run()
+    if not project.ok:
+      sys.exit(1)
 
 
 r"""
@@ -1587,24 +4348,49 @@ class Test:
       """
     )
 
-  def html_overview(self):
+  mermaid_cdn = "https://cdn.jsdelivr.net/npm/mermaid@11/dist/mermaid.esm.min.mjs"
+
+  def html_overview(self, events=None, mermaid=None):
     r"""
     html flavored mermaid overview
+
+    events: url of server-sent events carrying the overview,
+      the diagram is rendered again when it changed
+    mermaid: url of mermaid.esm.min.mjs, the cdn if None
     """
+    if None == mermaid:
+      mermaid = self.mermaid_cdn
     params = "{ startOnLoad: true }"
+    live = ""
+    if None != events:
+      current = json.dumps(Document.overview).replace("</", "<\\/")
+      live = f"""
+      let current = {current};
+      let count = 0;
+      const source = new EventSource('{events}');
+      source.addEventListener('overview', async (event) => {{
+        if (event.data === current) return;
+        current = event.data;
+        try {{
+          const {{ svg }} = await mermaid.render('overview' + ++count, current);
+          document.getElementById('overview').innerHTML = svg;
+        }} catch (e) {{
+          console.error(e);
+        }}
+      }});"""
     return f"""
 <html>
   <body>
     <h1>overview</h1>
-    <pre class="mermaid">
+    <pre class="mermaid" id="overview">
 
 {Document.overview}
 
     </pre>
 
     <script type="module">
-      import mermaid from 'https://cdn.jsdelivr.net/npm/mermaid@11/dist/mermaid.esm.min.mjs';
-      mermaid.initialize({params});
+      import mermaid from '{mermaid}';
+      mermaid.initialize({params});{live}
     </script>
   </body>
 </html>
@@ -1721,6 +4507,60 @@ class Test:
     print(TreeMaker)
     print(TreeMaker().dive())
 
+  def test_tree_node(self):
+    r"""
+    test typed nodes and the legacy adapters
+    """
+
+    tree = TreeMaker().dive()
+    print(tree)
+    legacy = tree.to_legacy()
+    print(legacy)
+    print(TreeNode.from_legacy(legacy) == tree)
+    print(TreeExplorer().node_type(tree), TreeExplorer().node_type(legacy))
+
+    a = Attributes({TreeExplorer.MARK_AS_HIERARCHY: "user key, not a hierarchy"})
+    print(TreeExplorer().begin(Nodes([Node(a, Nodes())]), {}))
+    try:
+      a.anything = 1
+    except AttributeError as e:
+      print(e)
+
+  def test_brace_expansion(self):
+    r"""
+    test BraceExpansion
+    """
+
+    brace = BraceExpansion()
+    paths = GitAddExplorer().begin(TreeMaker().dive(), {})
+    words = brace.compress(paths)
+    print(len(paths), len("\n".join(paths)), words)
+    print(brace.render_values(("mipmap-mdpi", "mipmap-hdpi", "mipmap-xhdpi")))
+    print(brace.compress(["/a/b c/1", "/a/b c/2", "/a/d/1", "/e"]))
+    print(brace.expand(r"/a/{b\ c,d\,e}/x{,_round}.webp"))
+    try:
+      brace.verify(["/a/1"], ["/a/{1,2}"])
+    except ValueError as e:
+      print(e)
+
+  def test_deep_tree(self, depth=5000):
+    r"""
+    test explorers on a tree deeper than the recursion limit
+    """
+
+    hierarchy = Hierarchy(project="p", version="v").get()
+    tree = [({"size": 48}, {TreeExplorer.MARK_AS_HIERARCHY: hierarchy})]
+    for level in range(depth):
+      tree = [({"level": level}, tree)]
+    print(sys.getrecursionlimit(), depth)
+    print(MkdirExplorer().begin(tree, {}))
+    print(GitAddExplorer().begin(tree, {}))
+    print(len(SchemeExplorer().begin(tree, {})))
+    result = TreeExplorer().begin(tree, {})
+    for level in range(depth):
+      result = result[0][1]
+    print(result[0][1] == hierarchy)
+
   def test_executor(self):
     r"""
     test executor
@@ -1735,6 +4575,336 @@ class Test:
     a.run()
     print(a._tree)
 
+  def test_cases(self):
+    r"""
+    test CaseExplorer and the flat case list
+    """
+
+    config = ConfigBase.load(["--config", "ConfigTest"])
+    executor = Executor(config)
+    executor._tree = executor.make_tree()
+    cases = CaseExplorer().begin(executor._tree, {})
+    print(len(cases), cases[0])
+    print(cases[0].attributes())
+    print(executor.make_cases().count("\n          ("), len(cases))
+
+  def test_schedule(self):
+    r"""
+    test Gray order of the outer cases and the visibility plan
+    """
+
+    plan = VisibilityPlan({"build": ["main", "debug", "release"], "shape": ["square", "round"]})
+    print(plan.gray([3, 2]))
+    config = ConfigBase.load(["--config", "Config1", "--schedule", "gray"])
+    executor = Executor(config)
+    executor._tree = executor.make_tree()
+    plan = executor.visibility_plan()
+    steps = plan.steps(executor._tree.children)
+    print([plan.state(node) for node in executor._tree.children])
+    print(steps)
+    print(plan.planned_calls(steps), plan.naive_calls(executor._tree.children))
+    print(executor.make_scheme().count("(visibility-plan"))
+
+  def test_log_variables(self):
+    r"""
+    test log-level and log-file in the variables block
+    """
+
+    config = ConfigBase.load(["--config", "Config1", "--log_level", "per-icon", "--log_file", "/tmp/icons.log"])
+    executor = Executor(config)
+    executor._tree = executor.make_tree()
+    scheme = executor.make_scheme()
+    print(scheme.count('"per-icon"'), scheme.count('"/tmp/icons.log"'), scheme.count("(cons 'log-"))
+
+  def test_up_to_date(self):
+    r"""
+    test check and record of fingerprints with a source and icons in a temporary directory
+    """
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as home:
+      source = os.path.join(home, "icon.xcf")
+      with open(source, "wb") as f:
+        f.write(b"source")
+      base = ["--config", "Config1", "--user_home", home, "--source", source]
+
+      def run(mode):
+        config = ConfigBase.load(base + ["--up_to_date", mode])
+        executor = Executor(config)
+        executor.run(MemoryWriter())
+        return executor
+
+      def paths_of(executor):
+        return executor.explorer(GitAddExplorer).begin(executor._tree, {})
+
+      paths = paths_of(run("check"))
+      for path in paths:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+          f.write(b"webp")
+      run("record")
+      print(len(paths), len(paths_of(run("check"))))
+      with open(paths[0], "wb") as f:
+        f.write(b"edited")
+      print(paths_of(run("check")) == paths[:1])
+      with open(source, "wb") as f:
+        f.write(b"source edited")
+      print(len(paths_of(run("check"))))
+
+  def test_audit(self):
+    r"""
+    test the audit with icons in a temporary directory
+    """
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as home:
+      config = ConfigBase.load(["--config", "Config1", "--user_home", home, "--audit", "1"])
+      executor = Executor(config)
+      executor._tree = executor.make_tree()
+      paths = executor.explorer(GitAddExplorer).begin(executor._tree, {})
+      for path in paths[1:]:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+          f.write(b"" if path == paths[2] else b"webp")
+      with open(os.path.join(os.path.dirname(paths[3]), "extra.webp"), "wb") as f:
+        f.write(b"webp")
+      audit = executor.audit_icons(io.StringIO())
+      print(audit, audit.files)
+      print(audit.missing == paths[:1], audit.empty == paths[2:3], len(audit.unexpected))
+
+  def test_verify(self):
+    r"""
+    test WebpHeader and the verifier with headers of each chunk in a temporary directory
+    """
+    import tempfile
+
+    def riff(chunk, payload):
+      return b"RIFF" + (4 + 8 + len(payload)).to_bytes(4, "little") + b"WEBP" + chunk + len(payload).to_bytes(4, "little") + payload
+
+    def vp8(width, height):
+      return riff(b"VP8 ", b"\x00\x00\x00\x9d\x01\x2a" + width.to_bytes(2, "little") + height.to_bytes(2, "little"))
+
+    def vp8l(width, height):
+      return riff(b"VP8L", b"\x2f" + ((width - 1) | (height - 1) << 14).to_bytes(4, "little") + b"\x00" * 5)
+
+    def vp8x(width, height):
+      return riff(b"VP8X", b"\x00" * 4 + (width - 1).to_bytes(3, "little") + (height - 1).to_bytes(3, "little"))
+
+    for make in (vp8, vp8l, vp8x):
+      print(WebpHeader(make(192, 144)))
+
+    with tempfile.TemporaryDirectory() as home:
+      config = ConfigBase.load(["--config", "Config1", "--user_home", home, "--verify", "1"])
+      executor = Executor(config)
+      executor._tree = executor.make_tree()
+      cases = executor.explorer(CaseExplorer).begin(executor._tree, {})
+      for index, case in enumerate(cases[1:]):
+        size = case.attributes()["size"]
+        os.makedirs(os.path.dirname(case.path()), exist_ok=True)
+        with open(case.path(), "wb") as f:
+          f.write((vp8, vp8l, vp8x)[index % 3](size, size) if 1 != index else vp8(size + 1, size))
+      with open(cases[3].path(), "wb") as f:
+        f.write(b"broken")
+      verifier = executor.verify_icons(io.StringIO())
+      print(verifier)
+      print([path for path, size, header in verifier.mismatched] == [cases[2].path()])
+
+  def test_bind(self, apps=100):
+    r"""
+    test a tree shared by apps, bound to each project and version at emit time
+    """
+    import time
+
+    config = ConfigBase.load(["--config", "Config1", "--project", "app0", "--version", "v0"])
+    executor = Executor(config)
+    start = time.perf_counter()
+    executor._tree = executor.make_tree()
+    print(f"tree {time.perf_counter() - start:.6f} seconds")
+    print(executor.make_tree() is executor._tree)
+    first = executor.make_git_add_sh()
+    start = time.perf_counter()
+    for index in range(apps):
+      text = executor.bind(project=f"app{index}", version=f"v{index}").make_git_add_sh()
+    print(f"{apps} apps {time.perf_counter() - start:.6f} seconds")
+    print(first == executor.bind(project="app0", version="v0").make_git_add_sh(), "/app99/v99/" in text)
+    try:
+      GitAddExplorer().begin(executor._tree, {})
+    except ValueError as e:
+      print(e)
+
+  def test_scheme_reader(self):
+    r"""
+    test round trip of the scheme list through scheme_reader
+    """
+    import tempfile
+
+    config = ConfigBase.load(["--config", "Config1", "--schedule", "gray"])
+    executor = Executor(config)
+    executor._tree = executor.make_tree()
+    scheme = executor.make_scheme()
+    forms = list(scheme_reader.read_forms(io.StringIO(scheme)))
+    print(len(forms), sorted(scheme_reader.let_variables(forms[0])))
+    with tempfile.TemporaryDirectory() as directory:
+      path = os.path.join(directory, "icon_list.scm")
+      with open(path, "w", encoding="utf-8") as f:
+        f.write(scheme)
+      tree = SchemeTreeReader(path).tree()
+      print(len(CaseExplorer().begin(tree, {})), len(tree.children))
+      print(executor.check_scheme(path))
+      executor.bind(project="Other")
+      print(executor.check_scheme(path))
+      config = ConfigBase.load(["--config", "Config1", "--scheme_input", path, "--project", "Other"])
+      reader = Executor(config)
+      reader._tree = reader.make_tree()
+      print(reader.make_git_add_sh() == executor.make_git_add_sh(), "/Other/" in reader.make_git_add_sh())
+      config = ConfigBase.load(["--config", "Config1", "--scheme_input", path, "--export_mode", "pyramid"])
+      try:
+        Executor(config).make_tree()
+      except ValueError as e:
+        print(e)
+
+  def test_parse_args(self):
+    r"""
+    test list args and plain args
+    """
+    config = ConfigBase.load([
+      "--config", "Config1", "--size", "1,", "--build", "a,b",
+      "--output", "out,v2", "--log_file", "[run],1.log", "--serve", "[::1]:8081", "--gzip", "0",
+    ])
+    print(config.iterator().size, config.iterator().build)
+    print(config._output, config._service)
+    print(config.service().address, config.output().log_file, bool(config._output["gzip"]))
+    print(GeneratorService.server_address(config.service().address))
+
+  def test_service(self):
+    r"""
+    test requests to the service, without a server
+    """
+    startup = ConfigBase.load([
+      "--config", "ConfigTest", "--size", "96", "--serve", "8081", "--workers", "1",
+      "--up_to_date", "check", "--scheme_input", "nowhere.scm", "--log_file", "/tmp/icons.log",
+    ])
+    service = GeneratorService(ConfigTest, 1, startup.explicit_args())
+    print(service._argv)
+    print(service.generate({})["git_add"].count("git add"))
+    print(service.generate({"size": [96, 144]})["git_add"].count("git add"))
+    print(len(service.generate({"shards": 2})))
+    for params in (
+      {"config": "GeneratorService"}, {"profile_dir": "/etc"}, {"profile": "app1"},
+      {"log_file": "/etc/passwd"}, {"shards": 1000}, {"schedule": "random"},
+    ):
+      try:
+        service.generate(params)
+      except ValueError as e:
+        print(e)
+    service._pool.shutdown()
+
+  def test_splice(self):
+    r"""
+    test splice of the variables block, replaced once and then unchanged
+    """
+    import tempfile
+
+    config = ConfigBase.load(["--config", "Config1"])
+    executor = Executor(config)
+    executor._tree = executor.make_tree()
+    with tempfile.TemporaryDirectory() as directory:
+      path = os.path.join(directory, "script.scm")
+      with open(path, "w", encoding="utf-8") as f:
+        f.write(f"(define (f)\n  (let*\n    (\n      {Executor.variables_begin}\n      {Executor.variables_end}\n    )\n    variables\n  )\n)\n")
+      print(executor.splice_scheme(path), executor.splice_scheme(path))
+      print(executor.check_scheme(path), sorted(os.listdir(directory)))
+
+  def test_shards(self, count=3):
+    r"""
+    test sharded scheme lists and the manifest
+    """
+
+    config = ConfigBase.load(["--config", "Config1", "--shards", str(count)])
+    writer = MemoryWriter()
+    Executor(config).run(writer)
+    manifest = json.loads(writer.value("manifest"))
+    print(sorted(writer.values()))
+    print([(shard["file"], shard["cases"], len(shard["outputs"])) for shard in manifest["shards"]])
+    print(manifest["outputs"] == writer.value("git_add").count("\ngit add "))
+
+  def test_peak_memory(self, builds=400):
+    r"""
+    compare peak memory of building whole strings and writing through Writer
+    """
+
+    import tracemalloc
+
+    config = ConfigDefault.load([])
+    config._iterator = {"build": [f"build{i}" for i in range(builds)]}
+    executor = Executor(config)
+    executor._tree = executor.make_tree()
+
+    with open(os.devnull, "w") as null:
+      tracemalloc.start()
+      strings = (
+        executor.make_mkdir_sh(),
+        executor.make_git_add_sh(),
+        executor.make_scheme(),
+      )
+      print(
+        "\n".join(strings[0:1] + tuple(f"cat <<'EOS'\n{x}\nEOS" for x in strings[1:])),
+        file=null
+      )
+      del strings
+      print("strings", tracemalloc.get_traced_memory()[1])
+      tracemalloc.stop()
+
+      tracemalloc.start()
+      executor.report(StdoutWriter(null))
+      print("writer", tracemalloc.get_traced_memory()[1])
+      tracemalloc.stop()
+
+  def benchmark_scheme_explorer(self, builds=200, repeat=3):
+    r"""
+    micro-benchmark of SchemeExplorer
+    prints time, peak traced memory and traversal state allocated per node
+    """
+
+    import time
+    import tracemalloc
+
+    iterator = Iterator(build=[f"build{i}" for i in range(builds)])
+    tree = TreeMaker(Hierarchy(), iterator, Dangeon()).dive()
+    class NullCollector(Collector):
+      def push(self, value):
+        pass
+
+    class Counter(TreeExplorer):
+      def leave_l(self, node, opts, results):
+        return 1 + sum(results)
+      def leave_n(self, node, opts, results):
+        return 1 + sum(results)
+      def func_a(self, node, opts):
+        return 1
+      def func_h(self, node, opts):
+        return 1
+
+    nodes = Counter().begin(tree, {})
+
+    for i in range(repeat):
+      indents = IndentTable()
+      context = SchemeContext(NullCollector(), indents)
+      explorer = SchemeExplorer()
+      tracemalloc.start()
+      start = time.perf_counter()
+      explorer.apply_node(tree, context)
+      elapsed = time.perf_counter() - start
+      peak = tracemalloc.get_traced_memory()[1]
+      tracemalloc.stop()
+      print(
+        f"nodes={nodes}",
+        f"usec/node={1e6 * elapsed / nodes:.3f}",
+        f"peak_bytes/node={peak / nodes:.1f}",
+        f"contexts/node={len(context._levels) / nodes:.6f}",
+        f"indents/node={len(indents._indents) / nodes:.6f}",
+      )
+
   def test_config(self):
     print(ConfigBase)
 
@@ -1781,6 +4951,33 @@ class Test:
     print(a.iterator())
     print(a.dangeon())
 
+  def test_profile(self, path="profiles/example.toml"):
+    r"""
+    test Profile and ConfigProfile
+    """
+
+    profile = Profile.load(path)
+    print(profile, profile.hierarchy, profile.iterator, profile.dangeon)
+    print(Profile.load(path) is profile)
+    config = ConfigBase.load(["--profile", path, "--size", "48"])
+    print(config.__class__.__name__, config.iterator(), config.dangeon())
+    print(TableIterator({"300": "mipmap-huge"}).convert("size", 300))
+    try:
+      Profile.resolve({"iterator": {"bild": ["x"]}}, "test")
+    except ValueError as e:
+      print(e)
+
+    import tempfile
+    with tempfile.TemporaryDirectory() as directory:
+      profiles = ProfileDirectory.of(directory)
+      try:
+        profiles.find("example")
+      except ValueError as e:
+        print(e)
+      shutil.copy(path, os.path.join(directory, "example.toml"))
+      os.utime(directory, ns=(0, os.stat(directory).st_mtime_ns + 1))
+      print(os.path.basename(profiles.find("example")))
+
   def test_misc(self):
     r"""
     test miscellaneous
@@ -1804,12 +5001,30 @@ if __name__ == '__main__':
   #Test().show_overview_with_mermaid_html()
 
   #Test().test_config()
+  #Test().test_profile()
   #Test().test_hierarchy_default()
   #Test().test_hierarchy()
   #Test().test_iterator()
   #Test().test_collector()
   #Test().test_floor_mixer()
+  #Test().test_tree_node()
+  #Test().test_brace_expansion()
+  #Test().test_deep_tree()
   #Test().test_executor()
+  #Test().test_shards()
+  #Test().test_audit()
+  #Test().test_verify()
+  #Test().test_bind()
+  #Test().test_scheme_reader()
+  #Test().test_splice()
+  #Test().test_service()
+  #Test().test_parse_args()
+  #Test().test_up_to_date()
+  #Test().test_schedule()
+  #Test().test_log_variables()
+  #Test().test_cases()
+  #Test().test_peak_memory()
+  #Test().benchmark_scheme_explorer()
 
   #Test().test_misc()
 
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+
+r"""
+export icons of the scheme shards with a pool of headless GIMP processes
+copyright 2025, hanagai
+
+gimp_batch_export.py
+version: March 29, 2025
+
+write shards and the manifest,
+  android_icon_specification.py --config Config1 --shards 4 --output out
+
+then export them,
+  gimp_batch_export.py --manifest out/icon_list.manifest.json --image icon.xcf --project MyApp --version v1
+
+each shard runs in its own process as,
+  gimp -i -b '(export-android-icons-batch "icon.xcf" "out/icon_list.0.scm" "MyApp" "v1")' -b '(gimp-quit 0)'
+
+--gimp takes any binary called the same way.
+expected outputs of the shard are given in $ANDROID_ICON_OUTPUTS, one per line,
+so a stand-in for tests can be as simple as,
+  #!/bin/sh
+  echo "$ANDROID_ICON_OUTPUTS" | while read f; do mkdir -p "${f%/*}"; : > "$f"; done
+"""
+
+import argparse
+import concurrent.futures
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+class ShardResult:
+  r"""
+  outcome of a shard after its attempts
+  """
+
+  def __init__(self, index, file):
+    self.index = index
+    self.file = file
+    self.returncode = None
+    self.attempts = 0
+    self.seconds = []
+    self.missing = []
+    self.error = ""
+
+  def __str__(self):
+    return (
+      f"shard {self.index}: {'ok' if self.ok else 'FAILED'}"
+      f" rc={self.returncode}"
+      f" attempts={self.attempts}"
+      f" seconds={'/'.join(f'{t:.2f}' for t in self.seconds)}"
+      f" missing={len(self.missing)}"
+    )
+
+  @property
+  def ok(self):
+    return 0 == self.returncode and not self.missing
+
+
+class BatchExport:
+  r"""
+  runs export-android-icons-batch for each shard in the manifest
+
+  Shards are independent, each loads the image by itself,
+  so they are run in parallel by a pool of jobs.
+  A shard fails when GIMP exits with non zero or an expected output is missing,
+  and is tried again up to retries times.
+  """
+
+  def __init__(self, manifest, image, project, version, gimp="gimp", jobs=None, retries=1, timeout=None):
+    self._manifest_path = manifest
+    self._image = image
+    self._project = project
+    self._version = version
+    self._gimp = gimp
+    self._jobs = jobs or os.cpu_count() or 1
+    self._retries = retries
+    self._timeout = timeout
+    with open(manifest, encoding="utf-8") as f:
+      self._manifest = json.load(f)
+
+  def case_file(self, shard):
+    file = shard["file"]
+    if file.endswith(".gz"):
+      raise ValueError(f"compressed shard cannot be read by GIMP: {file}")
+    return os.path.join(os.path.dirname(os.path.abspath(self._manifest_path)), file)
+
+  def scheme_string(self, text):
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+  def expression(self, shard):
+    arguments = (self._image, self.case_file(shard), self._project, self._version)
+    return "(export-android-icons-batch " + " ".join(map(self.scheme_string, arguments)) + ")"
+
+  def command(self, shard):
+    return [self._gimp, "-i", "-b", self.expression(shard), "-b", "(gimp-quit 0)"]
+
+  def outputs(self, shard):
+    r"""
+    expected outputs, the placeholder segments filled as GIMP does
+      /home/kuro/AndroidStudioProjects/{project}/{version}/... -> .../MyApp/v1/...
+    only whole segments equal to a placeholder are replaced.
+    raises ValueError for a manifest without placeholders
+    """
+    placeholders = self._manifest.get("placeholders")
+    if None == placeholders:
+      raise ValueError(f"no placeholders in {self._manifest_path}, write the manifest again")
+    values = {"project": self._project, "version": self._version}
+    replace = {token: values[key] for key, token in placeholders.items() if key in values}
+    return [
+      "/".join(replace.get(segment, segment) for segment in path.split("/"))
+      for path in shard.get("outputs", [])
+    ]
+
+  def run_shard(self, shard):
+    result = ShardResult(shard["index"], shard["file"])
+    command = self.command(shard)
+    outputs = self.outputs(shard)
+    env = dict(os.environ, ANDROID_ICON_OUTPUTS="\n".join(outputs))
+    while result.attempts <= self._retries:
+      result.attempts += 1
+      start = time.perf_counter()
+      try:
+        process = subprocess.run(command, env=env, capture_output=True, text=True, timeout=self._timeout)
+        result.returncode = process.returncode
+        result.error = process.stderr[-2000:]
+      except subprocess.TimeoutExpired:
+        result.returncode = -1
+        result.error = f"timeout after {self._timeout} seconds"
+      except OSError as e:
+        result.returncode = -1
+        result.error = str(e)
+        result.seconds.append(time.perf_counter() - start)
+        break
+      result.seconds.append(time.perf_counter() - start)
+      result.missing = [path for path in outputs if not os.path.exists(path)]
+      if result.ok:
+        break
+    return result
+
+  def run(self):
+    r"""
+    returns results in the order of shards
+    """
+    shards = self._manifest["shards"]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=self._jobs) as pool:
+      return list(pool.map(self.run_shard, shards))
+    r"""
+    threads only wait for GIMP processes, the work is in the processes
+    """
+
+
+def main():
+  parser = argparse.ArgumentParser(prog="gimp_batch_export.py", description="export icons of scheme shards by headless GIMP")
+  parser.add_argument("--manifest", required=True, help="icon_list.manifest.json written with --shards")
+  parser.add_argument("--image", required=True, help="image file to export icons from")
+  parser.add_argument("--project", required=True, help="project name")
+  parser.add_argument("--version", required=True, help="version name")
+  parser.add_argument("--gimp", default=os.environ.get("GIMP", "gimp"), help="GIMP binary ($GIMP or gimp)")
+  parser.add_argument("--jobs", type=int, default=None, help="number of GIMP processes (cpu count)")
+  parser.add_argument("--retries", type=int, default=1, help="retries of a failed shard (1)")
+  parser.add_argument("--timeout", type=float, default=None, help="seconds for a shard to finish")
+  args = parser.parse_args()
+
+  batch = BatchExport(
+    args.manifest, args.image, args.project, args.version,
+    gimp=args.gimp, jobs=args.jobs, retries=args.retries, timeout=args.timeout
+  )
+  start = time.perf_counter()
+  try:
+    results = batch.run()
+  except (OSError, ValueError) as e:
+    print(e, file=sys.stderr)
+    sys.exit(2)
+  for result in results:
+    print(result, file=sys.stderr)
+    if not result.ok:
+      for path in result.missing[:5]:
+        print(f"  missing: {path}", file=sys.stderr)
+      if result.error:
+        print("  " + result.error.strip().replace("\n", "\n  "), file=sys.stderr)
+  failed = sum(1 for result in results if not result.ok)
+  print(f"{len(results) - failed}/{len(results)} shards done in {time.perf_counter() - start:.2f} seconds", file=sys.stderr)
+  sys.exit(1 if failed else 0)
+
+
+class Test:
+  r"""
+  test cases, or hint for debugging...
+  """
+
+  stand_in = """#!/bin/sh
+echo "$ANDROID_ICON_OUTPUTS" | while read f; do mkdir -p "${f%/*}"; : > "$f"; done
+"""
+
+  def test_run(self):
+    r"""
+    test a run with a stand-in of GIMP
+    the home directory, src and build have the values of project and version,
+    only the placeholder segments are to be replaced.
+    """
+    import tempfile
+    import android_icon_specification
+
+    with tempfile.TemporaryDirectory() as directory:
+      home = os.path.join(directory, "app")
+      out = os.path.join(directory, "out")
+      config = android_icon_specification.ConfigBase.load([
+        "--config", "Config1", "--user_home", home, "--project", "app", "--version", "main",
+        "--shards", "2", "--output", out,
+      ])
+      android_icon_specification.Executor(config).run()
+      gimp = os.path.join(directory, "gimp")
+      with open(gimp, "w") as f:
+        f.write(self.stand_in)
+      os.chmod(gimp, 0o755)
+      manifest = os.path.join(out, "icon_list.manifest.json")
+      batch = BatchExport(manifest, "icon.xcf", "Other", "v2", gimp=gimp, jobs=2, retries=0)
+      outputs = [path for shard in batch._manifest["shards"] for path in batch.outputs(shard)]
+      print(outputs[0][len(directory):])
+      results = batch.run()
+      for result in results:
+        print(result)
+      print(all(os.path.exists(path) for path in outputs), len(outputs))
+
+
+if __name__ == '__main__':
+
+  #Test().test_run()
+
+  main()
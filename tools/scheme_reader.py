@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+
+r"""
+streaming reader of the scheme files written by android_icon_specification.py
+copyright 2025, hanagai
+
+scheme_reader.py
+version: March 29, 2025
+
+reads S-expressions form by form, the file is read line by line.
+read_forms builds each form whole, enough for small files.
+stream_list yields the elements of icon-list or case-list one by one,
+so a large case list is never held whole, only an element at a time.
+enough for the case lists and the scripts in script-fu,
+not a full reader of scheme.
+
+  (a b c)     -> [Symbol("a"), Symbol("b"), Symbol("c")]
+  ("k" . 96)  -> ("k", 96), dotted pairs are tuples
+  #\L         -> Char("L")
+  #t #f       -> True False
+  'x          -> [Symbol("quote"), x]
+  ; comment, and #! at the top of a file are skipped
+
+print the variables of a case list, and the number of its elements,
+  scheme_reader.py out/icon_list.scm
+
+the tree is rebuilt by android_icon_specification.py --scheme_input,
+and compared with the generated one by --scheme_check.
+"""
+
+import re
+import sys
+
+
+class Symbol(str):
+  r"""
+  a symbol, distinct from a string
+  """
+
+  __slots__ = ()
+
+  def __repr__(self):
+    return f"{self.__class__.__name__}({str.__repr__(self)})"
+
+
+class Char(str):
+  r"""
+  a character, #\L is Char("L") and #\Space is Char(" ")
+  """
+
+  __slots__ = ()
+
+  names = {"space": " ", "newline": "\n", "tab": "\t", "nul": "\0", "return": "\r"}
+
+  def __repr__(self):
+    return f"{self.__class__.__name__}({str.__repr__(self)})"
+
+
+DOT = Symbol(".")
+QUOTE = Symbol("quote")
+
+token_pattern = re.compile(r"""
+  [\s]+
+  | (?P<comment>;.*)
+  | (?P<open>\()
+  | (?P<close>\))
+  | (?P<quote>')
+  | (?P<string>"(?:[^"\\]|\\[\s\S])*")
+  | (?P<char>\#\\(?:[A-Za-z]{2,}|.))
+  | (?P<atom>[^\s()'";]+)
+  | (?P<partial>")
+""", re.VERBOSE)
+
+number_pattern = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+escapes = {"n": "\n", "t": "\t", "r": "\r", "\\": "\\", '"': '"'}
+
+
+def string_value(token):
+  body = token[1:-1]
+  if "\\" not in body:
+    return body
+  return re.sub(r"\\(.)", lambda m: escapes.get(m.group(1), m.group(1)), body)
+
+
+def atom_value(token):
+  if "#t" == token:
+    return True
+  if "#f" == token:
+    return False
+  if number_pattern.fullmatch(token):
+    return float(token) if any(c in token for c in ".eE") else int(token)
+  return Symbol(token)
+
+
+def tokens(stream):
+  r"""
+  (kind, value) of each token, a string may span lines
+  """
+  pending = ""
+  first = True
+  for line in stream:
+    if first:
+      first = False
+      if line.startswith("#!"):
+        continue
+    if pending:
+      line = pending + line
+      pending = ""
+    position = 0
+    length = len(line)
+    while position < length:
+      match = token_pattern.match(line, position)
+      kind = match.lastgroup
+      if "partial" == kind:
+        pending = line[position:]
+        break
+      position = match.end()
+      if None == kind or "comment" == kind:
+        continue
+      yield (kind, match.group(kind))
+  if pending:
+    raise ValueError(f"unterminated string: {pending[:40]!r}")
+
+
+def read_forms(stream):
+  r"""
+  yields top level forms one by one
+  each form is built whole before it is yielded.
+  """
+  stack = []
+  quotes = [0]
+  r"""
+  quotes counts ' waiting for the next datum at each depth
+  """
+
+  def datum(value):
+    while quotes[-1]:
+      quotes[-1] -= 1
+      value = [QUOTE, value]
+    return value
+
+  for kind, token in tokens(stream):
+    if "open" == kind:
+      stack.append([])
+      quotes.append(0)
+      continue
+    if "quote" == kind:
+      quotes[-1] += 1
+      continue
+    if "close" == kind:
+      if not stack:
+        raise ValueError("unexpected )")
+      items = stack.pop()
+      quotes.pop()
+      if 3 <= len(items) and DOT is items[-2]:
+        value = tuple(items[:-2]) + (items[-1],)
+      else:
+        value = items
+    elif "string" == kind:
+      value = string_value(token)
+    elif "char" == kind:
+      name = token[2:]
+      value = Char(Char.names.get(name.lower(), name) if 1 < len(name) else name)
+    elif "." == token:
+      value = DOT
+    else:
+      value = atom_value(token)
+    value = datum(value)
+    if stack:
+      stack[-1].append(value)
+    else:
+      yield value
+  if stack:
+    raise ValueError(f"{len(stack)} unclosed (")
+
+
+class Streamed:
+  r"""
+  in place of a list yielded element by element
+  """
+
+  __slots__ = ("name",)
+
+  def __init__(self, name):
+    self.name = name
+
+  def __repr__(self):
+    return f"{self.__class__.__name__}({self.name!r})"
+
+
+def stream_list(stream, names=("icon-list", "case-list")):
+  r"""
+  yields ("variables", {name: value}) of the bindings before the list named in names,
+  then ("item", value) for each element of the list, without building the list.
+  the list itself is Streamed(name) in the variables.
+
+    (let* ((hierarchy '(...)) ... (icon-list '( #\L (...) (...) ...))) ...)
+      -> ("variables", {"hierarchy": [...], ..., "icon-list": Streamed("icon-list")}),
+         ("item", Char("L")), ("item", [...]), ...
+
+  the rest of the file after the list is not read.
+  raises ValueError when no list is found
+  """
+  stack = []
+  quotes = [0]
+  streaming = None
+  r"""
+  streaming is the depth of the list being yielded, None before it
+  """
+
+  def datum(value):
+    while quotes[-1]:
+      quotes[-1] -= 1
+      value = [QUOTE, value]
+    return value
+
+  for kind, token in tokens(stream):
+    if "open" == kind:
+      if None == streaming and stack and 1 == len(stack[-1]) and stack[-1][0] in names and 1 == quotes[-1]:
+        bindings = stack[-2] if 2 <= len(stack) else []
+        variables = {
+          str(binding[0]): unquote(binding[1]) if 2 == len(binding) else None
+          for binding in bindings
+          if isinstance(binding, list) and binding and isinstance(binding[0], Symbol)
+        }
+        variables[str(stack[-1][0])] = Streamed(str(stack[-1][0]))
+        yield ("variables", variables)
+        streaming = len(stack)
+      stack.append([])
+      quotes.append(0)
+      continue
+    if "quote" == kind:
+      quotes[-1] += 1
+      continue
+    if "close" == kind:
+      if not stack:
+        raise ValueError("unexpected )")
+      items = stack.pop()
+      quotes.pop()
+      if streaming == len(stack):
+        return
+      if 3 <= len(items) and DOT is items[-2]:
+        value = tuple(items[:-2]) + (items[-1],)
+      else:
+        value = items
+    elif "string" == kind:
+      value = string_value(token)
+    elif "char" == kind:
+      name = token[2:]
+      value = Char(Char.names.get(name.lower(), name) if 1 < len(name) else name)
+    elif "." == token:
+      value = DOT
+    else:
+      value = atom_value(token)
+    value = datum(value)
+    if None != streaming and streaming + 1 == len(stack):
+      yield ("item", value)
+    elif stack:
+      stack[-1].append(value)
+  raise ValueError(f"no {' or '.join(names)} found")
+
+
+def unquote(value):
+  if isinstance(value, list) and 2 == len(value) and QUOTE == value[0]:
+    return value[1]
+  return value
+
+
+def let_variables(form):
+  r"""
+  {name: value} of the first let or let* binding icon-list or case-list
+  searched through the form, values are unquoted.
+  """
+  stack = [form]
+  while stack:
+    form = stack.pop()
+    if not isinstance(form, list):
+      continue
+    if 2 <= len(form) and form[0] in ("let", "let*") and isinstance(form[1], list):
+      names = [binding[0] for binding in form[1] if isinstance(binding, list) and binding]
+      if "icon-list" in names or "case-list" in names:
+        return {
+          str(binding[0]): unquote(binding[1]) if 2 == len(binding) else None
+          for binding in form[1] if isinstance(binding, list) and binding
+        }
+    stack.extend(reversed(form))
+  return None
+
+
+def read_variables(path):
+  r"""
+  variables of a case list, or of the variables block in a script
+  raises ValueError when none is found
+  """
+  with open(path, encoding="utf-8") as stream:
+    for form in read_forms(stream):
+      variables = let_variables(form)
+      if None != variables:
+        return variables
+  raise ValueError(f"no icon-list or case-list in {path}")
+
+
+def main():
+  for path in sys.argv[1:]:
+    with open(path, encoding="utf-8") as stream:
+      items = 0
+      for kind, value in stream_list(stream):
+        if "variables" == kind:
+          for name, variable in value.items():
+            text = repr(variable)
+            print(f"{name}: {text[:120]}{'...' if 120 < len(text) else ''}")
+        else:
+          items += 1
+      print(f"elements: {items}")
+
+
+if __name__ == '__main__':
+
+  main()
@@ -10,29 +10,355 @@ version: March 29, 2025
 
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import webbrowser
-from datetime import datetime, timedelta, timezone
+from email.utils import formatdate
+import argparse
+import gzip
+import hashlib
 import importlib
+import os
+import sys
+import threading
+import time
+
+
+class OverviewCache:
+  r"""
+  rendered html of the overview
+
+  The module is reloaded only when its file is modified,
+  because we might be editing the module.
+  Reloading is serialized by a lock,
+  requests arriving meanwhile wait and share the result.
+  """
+
+  module_name = "android_icon_specification"
+
+  def __init__(self, mermaid=None):
+    self._mermaid = mermaid
+    self._lock = threading.Lock()
+    self._module = None
+    self._path = None
+    self._mtime = None
+    self._page = None
+    self._overview = None
+    self._fresh = False
+
+  def path(self):
+    if None == self._path:
+      with self._lock:
+        if None == self._module:
+          self._module = __import__(self.module_name)
+          self._fresh = True
+        self._path = self._module.__file__
+    return self._path
+
+  def get(self):
+    r"""
+    returns (body, etag, last_modified), or None if never rendered
+    """
+    mtime = os.stat(self.path()).st_mtime_ns
+    if mtime == self._mtime:
+      return self._page
+    with self._lock:
+      if mtime != self._mtime:
+        self.reload(mtime)
+      return self._page
+
+  def reload(self, mtime):
+    r"""
+    keeps the last page when the module is broken while editing
+    """
+    self._mtime = mtime
+    try:
+      if self._fresh:
+        module = self._module
+        self._fresh = False
+      else:
+        module = importlib.reload(self._module)
+      overview = module.Document.overview
+      body = bytes(module.Test().html_overview(events="/events", mermaid=self._mermaid), "utf8")
+    except Exception as e:
+      print(f"reload failed: {e.__class__.__name__}: {e}", file=sys.stderr)
+      return
+    self._module = module
+    self._overview = overview
+    etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+    last_modified = formatdate(mtime / 1e9, usegmt=True)
+    self._page = (body, etag, last_modified)
+
+
+  def overview(self):
+    r"""
+    Document.overview of the last good module
+    """
+    self.get()
+    return self._overview
+
+
+class OverviewWatcher:
+  r"""
+  polls the module file and wakes the event streams when the overview changed
+
+  One thread is shared by all the open tabs.
+  It is started by the first stream, and only stats the file at each tick,
+  the module is reloaded by the cache when the file is modified.
+  """
+
+  def __init__(self, cache, interval=0.5):
+    self._cache = cache
+    self._interval = interval
+    self._condition = threading.Condition()
+    self._thread = None
+    self._version = 0
+    self._overview = None
+
+  def start(self):
+    with self._condition:
+      if None == self._thread:
+        self._overview = self._cache.overview()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+  def run(self):
+    while True:
+      time.sleep(self._interval)
+      try:
+        overview = self._cache.overview()
+      except OSError:
+        r"""
+        the file may be missing for a moment while an editor saves it
+        """
+        continue
+      if overview != self._overview:
+        with self._condition:
+          self._overview = overview
+          self._version += 1
+          self._condition.notify_all()
+
+  def wait(self, version, timeout):
+    r"""
+    returns (version, overview) once newer than version, or at timeout
+    """
+    self.start()
+    with self._condition:
+      self._condition.wait_for(lambda: version != self._version, timeout)
+      return (self._version, self._overview)
+
+
+class MermaidAssets:
+  r"""
+  mermaid dist served from a local directory
+
+  The directory is the one given by --mermaid_dist or $MERMAID_DIST,
+  or the vendored copy in vendor/mermaid next to this script.
+  Without any of them, the page loads mermaid from the cdn.
+
+  Files are served under /mermaid/<tag>/,
+  where the tag changes with the entry file,
+  so they can be cached by the browser for good.
+  Compressed bodies are kept in memory once made.
+  """
+
+  prefix = "/mermaid/"
+  entry = "mermaid.esm.min.mjs"
+  vendored = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vendor", "mermaid")
+  content_types = {
+    ".mjs": "text/javascript",
+    ".js": "text/javascript",
+    ".css": "text/css",
+    ".map": "application/json",
+    ".json": "application/json",
+  }
+
+  def __init__(self, directory=None):
+    if None == directory:
+      directory = os.environ.get("MERMAID_DIST")
+    if None == directory and os.path.isdir(self.vendored):
+      directory = self.vendored
+    if None != directory:
+      directory = os.path.realpath(directory)
+      if not os.path.isfile(os.path.join(directory, self.entry)):
+        raise ValueError(f"no {self.entry} in {directory}")
+    self.directory = directory
+    self._lock = threading.Lock()
+    self._compressed = {}
+
+  def url(self):
+    r"""
+    url of the entry, None to use the cdn
+    """
+    if None == self.directory:
+      return None
+    stat = os.stat(os.path.join(self.directory, self.entry))
+    tag = hashlib.sha1(f"{stat.st_mtime_ns}:{stat.st_size}".encode()).hexdigest()[:12]
+    return f"{self.prefix}{tag}/{self.entry}"
+
+  def resolve(self, path):
+    r"""
+    local file of /mermaid/<tag>/<name>, None outside of the directory
+    """
+    if None == self.directory or not path.startswith(self.prefix):
+      return None
+    parts = path[len(self.prefix):].split("?", 1)[0].split("/", 1)
+    if 2 != len(parts):
+      return None
+    file_path = os.path.realpath(os.path.join(self.directory, parts[1]))
+    if self.directory != os.path.commonpath([self.directory, file_path]):
+      return None
+    if not os.path.isfile(file_path):
+      return None
+    return file_path
+
+  def content_type(self, file_path):
+    return self.content_types.get(os.path.splitext(file_path)[1], "application/octet-stream")
+
+  def body(self, file_path, compress):
+    r"""
+    returns (body, etag)
+    """
+    stat = os.stat(file_path)
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    if not compress:
+      with open(file_path, "rb") as f:
+        return (f.read(), etag)
+    etag = etag[:-1] + '-gz"'
+    key = (file_path, etag)
+    body = self._compressed.get(key)
+    if None == body:
+      with self._lock:
+        body = self._compressed.get(key)
+        if None == body:
+          with open(file_path, "rb") as f:
+            body = gzip.compress(f.read())
+          self._compressed[key] = body
+    return (body, etag)
+
 
 class HttpRequestHandler(BaseHTTPRequestHandler):
 
+  assets = None
+  cache = None
+  watcher = None
+  keepalive = 15
+  r"""
+  assets, cache and watcher are made by configure, called from main
+  so importing this module reads no directory.
+  """
+
+  @classmethod
+  def configure(cls, assets):
+    cls.assets = assets
+    cls.cache = OverviewCache(assets.url())
+    cls.watcher = OverviewWatcher(cls.cache)
+
   def do_GET(self):
+    if "/events" == self.path:
+      self.events()
+      return
+
+    if self.path.startswith(MermaidAssets.prefix):
+      self.static()
+      return
+
+    if "/" != self.path:
+      r"""
+      favicon and others, answered without touching the module
+      """
+      self.send_response(404)
+      self.send_header('Content-Length', '0')
+      self.end_headers()
+      return
+
+    page = self.cache.get()
+    if None == page:
+      self.send_response(500)
+      self.send_header('Content-Length', '0')
+      self.end_headers()
+      return
+
+    body, etag, last_modified = page
+    if etag == self.headers.get('If-None-Match'):
+      self.send_response(304)
+      self.send_header('ETag', etag)
+      self.end_headers()
+      return
+
     self.send_response(200)
     self.send_header('Content-type', 'text/html')
-    expires = datetime.now(timezone.utc) + timedelta(seconds=1)
-    self.send_header('Expires', expires.strftime("%a, %d %b %Y %H:%M:%S GMT"))
+    self.send_header('Content-Length', str(len(body)))
+    self.send_header('Cache-Control', 'no-cache')
+    self.send_header('ETag', etag)
+    self.send_header('Last-Modified', last_modified)
     self.end_headers()
+    self.wfile.write(body)
+    r"""
+    no-cache lets the browser revalidate by ETag at every load
+    """
 
-    module = __import__("android_icon_specification")
-    importlib.reload(module)
+  def static(self):
     r"""
-    force reload, because we might editing the module
+    mermaid assets, cached by the browser for a year
     """
-    content = module.Test().html_overview()
-    self.wfile.write(bytes(content, "utf8"))
+    file_path = self.assets.resolve(self.path)
+    if None == file_path:
+      self.send_response(404)
+      self.send_header('Content-Length', '0')
+      self.end_headers()
+      return
+
+    compress = "gzip" in self.headers.get('Accept-Encoding', "")
+    body, etag = self.assets.body(file_path, compress)
+    if etag == self.headers.get('If-None-Match'):
+      self.send_response(304)
+      self.send_header('ETag', etag)
+      self.end_headers()
+      return
+
+    self.send_response(200)
+    self.send_header('Content-type', self.assets.content_type(file_path))
+    self.send_header('Content-Length', str(len(body)))
+    self.send_header('Cache-Control', 'public, max-age=31536000, immutable')
+    self.send_header('ETag', etag)
+    self.send_header('Vary', 'Accept-Encoding')
+    if compress:
+      self.send_header('Content-Encoding', 'gzip')
+    self.end_headers()
+    self.wfile.write(body)
+
+  def events(self):
+    r"""
+    server-sent events, the current overview first and then each change
+
+    The page ignores an overview equal to the one it shows,
+    so reconnecting does not render again.
+    """
+    self.send_response(200)
+    self.send_header('Content-type', 'text/event-stream')
+    self.send_header('Cache-Control', 'no-cache')
+    self.end_headers()
+
+    version = None
+    try:
+      while True:
+        current, overview = self.watcher.wait(version, self.keepalive)
+        if current == version:
+          self.wfile.write(b": keepalive\n\n")
+        else:
+          version = current
+          data = "".join(f"data: {line}\n" for line in overview.split("\n"))
+          self.wfile.write(bytes(f"event: overview\n{data}\n", "utf8"))
+        self.wfile.flush()
+    except (BrokenPipeError, ConnectionResetError):
+      pass
 
 
 def main():
 
+  parser = argparse.ArgumentParser(description="show the overview of android_icon_specification.py")
+  parser.add_argument("--mermaid_dist", help="directory of mermaid dist, has mermaid.esm.min.mjs")
+  args = parser.parse_args()
+  HttpRequestHandler.configure(MermaidAssets(args.mermaid_dist))
+
   PROTOCOL = "http"
   ADDRESS = "127.0.0.1"
   PORT = 8080